@@ -5,6 +5,7 @@ from loguru import logger
 from .cli import Cli
 from .data import Data, Filter
 from .plot import Plot
+from .series import Series
 
 
 class Analyze(Cli):
@@ -49,6 +50,16 @@ class Analyze(Cli):
                             action="store_true",
                             help="Parse data live instead of restoring")
 
+        parser.add_argument(
+            "--repos",
+            "-g",
+            type=str,
+            nargs="+",
+            metavar="REPO",
+            default=[Data.DEFAULT_REPO],
+            help="The repositories to analyze (default: {})".format(
+                Data.DEFAULT_REPO))
+
         select_group = parser.add_mutually_exclusive_group()
         select_group.add_argument("--created",
                                   "-1",
@@ -117,35 +128,27 @@ class Analyze(Cli):
             filter_text = "issues"
             fil = Filter.ISSUES
 
-        # Parse the data
-        data = Data(parse=self.args.parse, filter_value=fil)
-
         # Created over time
         if self.args.created:
-            plot = Plot(data.created_time_series())
+            plot = Plot(self.__series("created_time_series", fil))
             x = plot.time("Created %s over time" % filter_text)
             plot.annotate_chunked(x)
 
         # Closed over time
         if self.args.closed:
-            plot = Plot(data.closed_time_series())
+            plot = Plot(self.__series("closed_time_series", fil))
             x = plot.time("Closed %s over time" % filter_text)
             plot.annotate_chunked(x)
 
         # Created vs Closed over time
         if self.args.created_vs_closed:
-            plot = Plot(data.created_vs_closed_time_series())
+            plot = Plot(self.__series("created_vs_closed_time_series", fil))
             x = plot.time("Created vs closed %s over time" % filter_text)
             plot.annotate_chunked(x)
 
-        if self.args.labels_by_name or self.args.labels_by_group or (
-                self.args.users_by_created or self.args.users_by_closed):
-            data.include_regex = self.args.include
-            data.exclude_regex = self.args.exclude
-
         # Label usage by name
         if self.args.labels_by_name:
-            series = data.label_name_usage_series()
+            series = self.__series("label_name_usage_series", fil)
             plot = Plot(series)
             logger.info("Got {} distinct labels and {} results", len(series),
                         sum(series))
@@ -155,7 +158,7 @@ class Analyze(Cli):
 
         # Label usage by name
         if self.args.labels_by_group:
-            series = data.label_group_usage_series()
+            series = self.__series("label_group_usage_series", fil)
             plot = Plot(series)
             logger.info("Got {} distinct label groups and {} results",
                         len(series), sum(series))
@@ -165,7 +168,7 @@ class Analyze(Cli):
 
         # Created by user
         if self.args.users_by_created:
-            series = data.user_created_series()
+            series = self.__series("user_created_series", fil)
             plot = Plot(series)
             logger.info("Got {} distinct users and {} results", len(series),
                         sum(series))
@@ -174,7 +177,7 @@ class Analyze(Cli):
 
         # Closed by user
         if self.args.users_by_closed:
-            series = data.user_closed_series()
+            series = self.__series("user_closed_series", fil)
             plot = Plot(series)
             logger.info("Got {} distinct users and {} results", len(series),
                         sum(series))
@@ -183,7 +186,7 @@ class Analyze(Cli):
 
         # Release notes statistics
         if self.args.release_notes_stats:
-            series = data.release_notes_stats()
+            series = self.__series("release_notes_stats", fil)
             plot = Plot(series)
             plot.barh("kind/* labels for PRs containing release notes",
                       self.args.count)
@@ -194,3 +197,8 @@ class Analyze(Cli):
 
         if not self.args.no_plot_gtk:
             Plot.show()
+
+    def __series(self, method: str, fil: Filter) -> Series:
+        # Computed per repository shard and merged afterwards
+        return Data.sharded_series(self.args.repos, method, self.args.parse,
+                                   fil, self.args.include, self.args.exclude)
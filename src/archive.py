@@ -0,0 +1,224 @@
+import hashlib
+import json
+import lzma
+import multiprocessing
+import os
+import shutil
+import struct
+import tarfile
+import tempfile
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
+
+from loguru import logger
+
+
+class Archive():
+    __path: str
+    __index: Dict[str, Any]
+
+    # Every block is an independent xz stream, followed by a JSON index and
+    # a fixed size footer: <index length: uint64> <magic>
+    MAGIC = b"KABLKv01"
+    FOOTER = struct.Struct("<Q8s")
+
+    BLOCK_SIZE = 4 * 1024 * 1024
+    PRESET = 6
+
+    # Amount of blocks held in memory and processed in parallel at once
+    WINDOW = 2 * (os.cpu_count() or 1)
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__index = Archive.__read_index(path)
+
+    @property
+    def name(self) -> str:
+        return self.__index["name"]
+
+    @property
+    def size(self) -> int:
+        return self.__index["size"]
+
+    @property
+    def blocks(self) -> List[List[int]]:
+        return self.__index["blocks"]
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        if os.path.getsize(path) < Archive.FOOTER.size:
+            return False
+        with open(path, "rb") as f:
+            f.seek(-Archive.FOOTER.size, os.SEEK_END)
+            _, magic = Archive.FOOTER.unpack(f.read(Archive.FOOTER.size))
+        return magic == Archive.MAGIC
+
+    @staticmethod
+    def __read_index(path: str) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            f.seek(-Archive.FOOTER.size, os.SEEK_END)
+            footer_at = f.tell()
+            length, magic = Archive.FOOTER.unpack(
+                f.read(Archive.FOOTER.size))
+            if magic != Archive.MAGIC:
+                raise ValueError("{} is no block archive".format(path))
+            f.seek(footer_at - length)
+            return json.loads(f.read(length))
+
+    @staticmethod
+    def __executor() -> Executor:
+        # Daemonic pool workers cannot fork, but lzma releases the GIL so
+        # threads are the next best choice there
+        if multiprocessing.current_process().daemon:
+            return ThreadPoolExecutor(max_workers=os.cpu_count())
+        return ProcessPoolExecutor()
+
+    @staticmethod
+    def compress_block(block: bytes) -> Tuple[int, bytes]:
+        return len(block), lzma.compress(block, preset=Archive.PRESET)
+
+    @staticmethod
+    def hash_block(block: bytes) -> str:
+        return hashlib.sha256(block).hexdigest()
+
+    @staticmethod
+    def __previous_blocks(path: str) -> Dict[str, List[int]]:
+        # Compressed blocks of an earlier archive by their raw content hash,
+        # which are only reusable if compressed with the same settings
+        if not os.path.isfile(path) or not Archive.is_archive(path):
+            return {}
+        index = Archive.__read_index(path)
+        if index["block_size"] != Archive.BLOCK_SIZE or index.get(
+                "preset") != Archive.PRESET:
+            return {}
+        return dict(zip(index.get("hashes", []), index["blocks"]))
+
+    @staticmethod
+    def __read_at(path: str, offset: int, length: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    @staticmethod
+    def __read_windows(path: str, window: int) -> Iterator[List[bytes]]:
+        # Read only as many blocks as the workers can process at once
+        with open(path, "rb") as f:
+            while True:
+                blocks = []
+                for _ in range(window):
+                    block = f.read(Archive.BLOCK_SIZE)
+                    if not block:
+                        break
+                    blocks.append(block)
+                if not blocks:
+                    break
+                yield blocks
+
+    @staticmethod
+    def create(source: str, target: str, xz: bool = False):
+        if xz:
+            logger.info("Compressing {} to xz tarball {}", source, target)
+            with tarfile.open(target, "w:xz") as tar:
+                tar.add(source, os.path.basename(source))
+            return
+
+        logger.info("Compressing {} to block archive {}", source, target)
+        # Unchanged blocks of an earlier archive at the target get copied
+        # instead of compressed again, so only changed blocks cost CPU time
+        previous = Archive.__previous_blocks(target)
+        blocks = []
+        hashes = []
+        offset = 0
+        reused = 0
+        temp = target + ".tmp"
+        try:
+            with open(temp, "wb") as f, Archive.__executor() as executor:
+                for raw_blocks in Archive.__read_windows(
+                        source, Archive.WINDOW):
+                    digests = [Archive.hash_block(x) for x in raw_blocks]
+                    changed = [
+                        x for x, digest in zip(raw_blocks, digests)
+                        if digest not in previous
+                    ]
+                    compressed_blocks = executor.map(Archive.compress_block,
+                                                     changed)
+                    for raw, digest in zip(raw_blocks, digests):
+                        if digest in previous:
+                            old_offset, length, _ = previous[digest]
+                            compressed = Archive.__read_at(
+                                target, old_offset, length)
+                            reused += 1
+                        else:
+                            _, compressed = next(compressed_blocks)
+                        f.write(compressed)
+                        blocks.append([offset, len(compressed), len(raw)])
+                        hashes.append(digest)
+                        offset += len(compressed)
+
+                index = json.dumps({
+                    "name": os.path.basename(source),
+                    "size": os.path.getsize(source),
+                    "block_size": Archive.BLOCK_SIZE,
+                    "preset": Archive.PRESET,
+                    "blocks": blocks,
+                    "hashes": hashes,
+                }).encode()
+                f.write(index)
+                f.write(Archive.FOOTER.pack(len(index), Archive.MAGIC))
+            os.replace(temp, target)
+        except BaseException:
+            os.remove(temp)
+            raise
+
+        logger.info("Wrote {} blocks to {}, {} of them unchanged",
+                    len(blocks), target, reused)
+
+    @staticmethod
+    def extract(path: str, target_dir: str):
+        # Extract into a temporary location first and rename afterwards, so
+        # interrupted extractions never leave incomplete files behind
+        temp = tempfile.mkdtemp(dir=target_dir)
+        try:
+            if Archive.is_archive(path):
+                Archive(path).__extract(temp)
+            else:
+                logger.info("Extracting xz tarball {}", path)
+                with tarfile.open(path) as tar:
+                    tar.extractall(path=temp)
+
+            for name in os.listdir(temp):
+                os.replace(os.path.join(temp, name),
+                           os.path.join(target_dir, name))
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+
+    def __extract(self, target_dir: str):
+        target = os.path.join(target_dir, self.name)
+        logger.info("Extracting {} blocks from {}", len(self.blocks),
+                    self.__path)
+        with open(target, "wb") as f:
+            for block in self.read_blocks(range(len(self.blocks))):
+                f.write(block)
+
+    def read_blocks(self, indexes: Any) -> Iterator[bytes]:
+        indexes = iter(indexes)
+        with open(self.__path, "rb") as f, Archive.__executor() as executor:
+            # Read only as many blocks as the workers can process at once
+            while True:
+                compressed = []
+                for i in islice(indexes, Archive.WINDOW):
+                    offset, length, _ = self.blocks[i]
+                    f.seek(offset)
+                    compressed.append(f.read(length))
+                if not compressed:
+                    break
+                yield from executor.map(lzma.decompress, compressed)
+
+    def read(self, offset: int, size: int) -> bytes:
+        first = offset // self.__index["block_size"]
+        last = (offset + size - 1) // self.__index["block_size"]
+        data = b"".join(self.read_blocks(range(first, last + 1)))
+        start = offset - first * self.__index["block_size"]
+        return data[start:start + size]
@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Batcher():
+    __predict: Callable[[List[str]], List[Any]]
+    __max_batch_size: int
+    __max_wait: float
+
+    # Batches are predicted in the executor, while the amount of queued
+    # texts is limited to fail fast on overload
+    __executor: Optional[Executor]
+    __max_queue: int
+    __queued: int
+
+    __pending: List[Tuple[str, asyncio.Future]]
+    __timer: Optional[asyncio.TimerHandle]
+
+    def __init__(self,
+                 predict: Callable[[List[str]], List[Any]],
+                 max_batch_size: int,
+                 max_wait: float,
+                 executor: Optional[Executor] = None,
+                 max_queue: int = 256):
+        self.__predict = predict
+        self.__max_batch_size = max_batch_size
+        self.__max_wait = max_wait
+        self.__executor = executor
+        self.__max_queue = max_queue
+        self.__queued = 0
+        self.__pending = []
+        self.__timer = None
+
+    @property
+    def queued(self) -> int:
+        return self.__queued
+
+    async def predict(self, texts: List[str]) -> List[Any]:
+        if self.__queued + len(texts) > self.__max_queue:
+            raise QueueFullError("{} texts queued, limit is {}".format(
+                self.__queued, self.__max_queue))
+
+        loop = asyncio.get_event_loop()
+
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.__pending.append((text, future))
+            futures.append(future)
+
+        # Flush full batches right away, otherwise wait for more requests
+        # to join the batch
+        if len(self.__pending) >= self.__max_batch_size:
+            self.__flush()
+        elif self.__timer is None:
+            self.__timer = loop.call_later(self.__max_wait, self.__flush)
+
+        self.__queued += len(texts)
+        try:
+            return list(await asyncio.gather(*futures))
+        finally:
+            self.__queued -= len(texts)
+
+    def __flush(self):
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        loop = asyncio.get_event_loop()
+        while self.__pending:
+            batch = self.__pending[:self.__max_batch_size]
+            self.__pending = self.__pending[self.__max_batch_size:]
+            logger.debug("Predicting batch of size {}", len(batch))
+
+            # Keep the event loop free while predicting
+            task = loop.run_in_executor(self.__executor, self.__predict,
+                                        [text for text, _ in batch])
+            task.add_done_callback(partial(Batcher.__resolve, batch))
+
+    @staticmethod
+    def __resolve(batch: List[Tuple[str, asyncio.Future]],
+                  task: asyncio.Future):
+        error = asyncio.CancelledError() if task.cancelled() \
+            else task.exception()
+        if error is not None:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, task.result()):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,135 @@
+import glob
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .cli import Cli
+from .predict import Predict
+from .serve import Serve
+
+
+class Benchmark(Cli):
+    URL = "http://localhost:8080/v1/models/{}:predict".format(
+        Serve.SERVICE_NAME)
+
+    @staticmethod
+    def add_parser(command: str, subparsers: Any):
+        parser = subparsers.add_parser(
+            command, help="benchmark a running prediction server")
+
+        parser.add_argument("--url",
+                            "-u",
+                            type=str,
+                            default=Benchmark.URL,
+                            help="The predict URL (default: {})".format(
+                                Benchmark.URL))
+
+        parser.add_argument("--requests",
+                            "-n",
+                            type=int,
+                            default=1000,
+                            help="The total amount of requests")
+
+        parser.add_argument("--concurrency",
+                            "-c",
+                            type=int,
+                            default=16,
+                            help="The amount of parallel clients")
+
+        parser.add_argument("--text",
+                            "-t",
+                            type=str,
+                            default=Predict.POSITIVE_TEST_TEXT,
+                            help="The text to predict")
+
+        parser.add_argument(
+            "--server-pid",
+            "-p",
+            type=int,
+            help="Report the memory of the server process and its workers")
+
+    def run(self):
+        body = json.dumps({"text": self.args.text}).encode()
+
+        logger.info("Sending {} requests with {} clients to {}",
+                    self.args.requests, self.args.concurrency, self.args.url)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            latencies = list(
+                executor.map(lambda _: self.__request(body),
+                             range(self.args.requests)))
+        duration = time.perf_counter() - start
+
+        succeeded = [x for x in latencies if x is not None]
+        logger.info("Finished in {:.2f}s: {} succeeded, {} failed", duration,
+                    len(succeeded),
+                    len(latencies) - len(succeeded))
+        if not succeeded:
+            return
+
+        logger.info("Throughput: {:.1f} requests/s", len(succeeded) / duration)
+        Benchmark.log_latencies(succeeded)
+
+        if self.args.server_pid:
+            Benchmark.log_memory(self.args.server_pid)
+
+    @staticmethod
+    def log_latencies(latencies: List[float]):
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        logger.info("Latency p50: {:.2f}ms, p90: {:.2f}ms, p99: {:.2f}ms",
+                    p50, p90, p99)
+
+    @staticmethod
+    def log_memory(pid: int):
+        # The proportional set size splits shared pages between the
+        # processes, so the sum does not count copy-on-write pages twice
+        pids = [pid] + Benchmark.__children(pid)
+        rss = sum(Benchmark.__memory(x, "Rss") for x in pids)
+        pss = sum(Benchmark.__memory(x, "Pss") for x in pids)
+        logger.info("Memory of {} server processes: RSS {:.1f}MiB, "
+                    "PSS {:.1f}MiB", len(pids), rss / 1024, pss / 1024)
+
+    @staticmethod
+    def __children(pid: int) -> List[int]:
+        children: List[int] = []
+        for path in glob.glob("/proc/{}/task/*/children".format(pid)):
+            with open(path, "r") as f:
+                for child in f.read().split():
+                    children.append(int(child))
+                    children += Benchmark.__children(int(child))
+        return children
+
+    @staticmethod
+    def __memory(pid: int, key: str) -> int:
+        # Returns the memory in KiB
+        path = "/proc/{}/smaps_rollup".format(pid)
+        if not os.path.isfile(path):
+            path = "/proc/{}/smaps".format(pid)
+
+        total = 0
+        with open(path, "r") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    total += int(line.split()[1])
+        return total
+
+    def __request(self, body: bytes) -> Optional[float]:
+        request = urllib.request.Request(
+            self.args.url,
+            data=body,
+            headers={"Content-Type": "application/json"})
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+        except Exception as e:
+            logger.debug("Request failed: {}", e)
+            return None
+        return time.perf_counter() - start
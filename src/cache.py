@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class PredictionCache():
+    # Maps the text keys to their label scores and expiry time, ordered from
+    # the least to the most recently used entry
+    __entries: "OrderedDict[str, Tuple[List[float], float]]"
+
+    # Texts being predicted right now, mapped to the prediction task and
+    # their position within its batch
+    __in_flight: Dict[str, Tuple[asyncio.Future, int]]
+
+    __max_size: int
+    __ttl: Optional[float]
+    __version: str
+
+    __hits: int
+    __misses: int
+    __coalesced: int
+
+    def __init__(self,
+                 version: str,
+                 max_size: int = 10000,
+                 ttl: Optional[float] = None):
+        self.__entries = OrderedDict()
+        self.__in_flight = {}
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__version = version
+        self.__hits = 0
+        self.__misses = 0
+        self.__coalesced = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.__version,
+            "size": len(self.__entries),
+            "max_size": self.__max_size,
+            "ttl": self.__ttl,
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "coalesced": self.__coalesced,
+        }
+
+    def key(self, text: str) -> str:
+        # The raw text, since the preprocessing depends on its line breaks
+        return hashlib.sha256("{}\0{}".format(self.__version,
+                                              text).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+
+        result, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.__entries[key]
+            return None
+
+        self.__entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: List[float]):
+        expires_at = float("inf") if self.__ttl is None \
+            else time.monotonic() + self.__ttl
+        self.__entries[key] = (result, expires_at)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    async def predict(
+            self, texts: List[str],
+            predict: Callable[[List[str]], Awaitable[List[List[float]]]]
+    ) -> List[List[float]]:
+        keys = [self.key(x) for x in texts]
+
+        results: Dict[str, Any] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+
+            result = self.get(key)
+            if result is not None:
+                self.__hits += 1
+                results[key] = result
+            elif key in self.__in_flight:
+                self.__coalesced += 1
+                results[key] = self.__in_flight[key]
+            else:
+                self.__misses += 1
+                missing[key] = text
+
+        # Predict all missing texts at once, later requests for the same
+        # texts wait for this task instead of predicting them again
+        if missing:
+            task = asyncio.ensure_future(predict(list(missing.values())))
+            task.add_done_callback(partial(self.__done, list(missing)))
+            for i, key in enumerate(missing):
+                self.__in_flight[key] = (task, i)
+                results[key] = (task, i)
+
+        for key, result in results.items():
+            if isinstance(result, tuple):
+                # Shield the task from cancelling, because other requests
+                # may wait for it too
+                task, i = result
+                results[key] = (await asyncio.shield(task))[i]
+
+        return [results[x] for x in keys]
+
+    def __done(self, keys: List[str], task: asyncio.Future):
+        for key in keys:
+            self.__in_flight.pop(key, None)
+
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        for key, result in zip(keys, task.result()):
+            self.put(key, result)
+        logger.debug("Cached {} prediction results", len(keys))
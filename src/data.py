@@ -3,20 +3,27 @@ import os
 import pickle
 import random
 import re
-import tarfile
+import sys
 import time
-from concurrent.futures import ThreadPoolExecutor
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from itertools import repeat
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Set,
+                    Tuple)
 
 from loguru import logger
 
+from .archive import Archive
+from .engine import Engine
 from .issue import Issue
 from .label import Label
-from .nlp import Nlp
+from .manifest import Manifest
+from .preprocessor import Preprocessor
 from .pull_request import PullRequest
 from .series import Series
+from .store import Store
 
 
 class Filter(Enum):
@@ -31,52 +38,189 @@ class Data():
     __pull_requests: Dict[int, PullRequest]
 
     __filter: Filter
-    __api_json: Optional[List[Any]]
+    __api_count: int
+
+    # Latest `updated_at` of the parsed API records
+    __snapshot: Optional[str]
 
     __include_regex: Optional[str]
     __exclude_regex: Optional[str]
 
     __now: float
 
+    # The repository this data belongs to
+    __repo: str
+
     DATA_DIR = "data"
+    SHARDS_DIR = os.path.join(DATA_DIR, "shards")
+    DEFAULT_REPO = "kubernetes/kubernetes"
 
     API_JSON = "api.json"
     API_DATA_JSON = os.path.join(DATA_DIR, API_JSON)
     API_DATA_TARBALL = os.path.join(DATA_DIR, "api.tar.xz")
+    API_DATA_ARCHIVE = os.path.join(DATA_DIR, "api.blk")
+    API_STORE = os.path.join(DATA_DIR, "api.db")
+
+    # The store is a local working copy, only its compressed snapshot gets
+    # committed
+    API_STORE_ARCHIVE = os.path.join(DATA_DIR, "api.db.blk")
 
     FILE = "data.pickle"
     PATH = os.path.join(DATA_DIR, FILE)
     TARBALL = os.path.join(DATA_DIR, "data.tar.xz")
+    ARCHIVE = os.path.join(DATA_DIR, "data.blk")
 
     PR_KEY = "pull_request"
 
-    def __init__(self, parse: bool = False, filter_value: Filter = Filter.ALL):
+    # The pull request IDs of the latest training and validation split
+    TRAINING_FILE = os.path.join(DATA_DIR, "training.json")
+    VALIDATION_FILE = os.path.join(DATA_DIR, "validation.json")
+
+    # Amount of earlier training items replayed per new item when training
+    # incrementally
+    REPLAY_RATIO = 1.0
+
+    # Parsing progress, which is no part of the dumped data set
+    TRANSIENT_STATE = ["_Data__now", "_Data__api_count"]
+
+    # Series which accumulate over time, all others are counts per key
+    CUMULATIVE_SERIES = [
+        "created_time_series",
+        "closed_time_series",
+        "created_vs_closed_time_series",
+    ]
+
+    def __init__(self,
+                 parse: bool = False,
+                 filter_value: Filter = Filter.ALL,
+                 repo: str = DEFAULT_REPO):
         if not parse:
-            Data.__extract_data()
+            Data.__extract_data(repo)
 
-            logger.info("Loading pickle dataset")
-            self.__dict__.update(pickle.load(open(Data.PATH, "rb")))
+            logger.info("Loading pickle dataset for {}", repo)
+            self.__dict__.update(
+                pickle.load(open(Data.path(Data.PATH, repo), "rb")))
             self.__log_summary()
 
             self.__filter = filter_value
+            self.__repo = repo
             return
 
         self.__filter = filter_value
+        self.__repo = repo
         self.__include_regex = None
         self.__exclude_regex = None
 
-        logger.info("Parsing data")
-        Data.__extract_api_data()
-
-        api_data_file = open(Data.API_DATA_JSON, "r")
-        logger.info("Loading API JSON file")
-        self.__api_json = json.load(api_data_file)
-        self.__init_api_json()
-
-    def __init_api_json(self):
-        logger.info("Parsing API JSON content")
+        logger.info("Parsing data for {}", repo)
         self.__issues = {}
         self.__pull_requests = {}
+        self.__snapshot = None
+        self.__init_api_store(Data.store(repo))
+
+    @staticmethod
+    def shard_series(repo: str, method: str, parse: bool, filter_value: Filter,
+                     include: Optional[str], exclude: Optional[str]) -> Series:
+        data = Data(parse=parse, filter_value=filter_value, repo=repo)
+        data.include_regex = include
+        data.exclude_regex = exclude
+        return getattr(data, method)()
+
+    @staticmethod
+    def sharded_series(repos: List[str],
+                       method: str,
+                       parse: bool = False,
+                       filter_value: Filter = Filter.ALL,
+                       include: Optional[str] = None,
+                       exclude: Optional[str] = None) -> Series:
+        if len(repos) == 1:
+            return Data.shard_series(repos[0], method, parse, filter_value,
+                                     include, exclude)
+
+        logger.info("Computing {} for {} shards", method, len(repos))
+        with ProcessPoolExecutor() as executor:
+            series = list(
+                executor.map(Data.shard_series, repos, repeat(method),
+                             repeat(parse), repeat(filter_value),
+                             repeat(include), repeat(exclude)))
+
+        if method in Data.CUMULATIVE_SERIES:
+            return Series.merge_cumulative(series)
+        return Series.merge_counts(series)
+
+    @staticmethod
+    def shard_dir(repo: str) -> str:
+        # The default repository stays in the top level data directory
+        if repo == Data.DEFAULT_REPO:
+            return Data.DATA_DIR
+        return os.path.join(Data.SHARDS_DIR, *repo.split("/"))
+
+    @staticmethod
+    def path(path: str, repo: str = DEFAULT_REPO) -> str:
+        shard_dir = Data.shard_dir(repo)
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, os.path.basename(path))
+
+    @staticmethod
+    def incremental(repo: str = DEFAULT_REPO) -> "Data":
+        if not any(
+                os.path.isfile(Data.path(x, repo))
+                for x in [Data.PATH, Data.ARCHIVE, Data.TARBALL]):
+            logger.info("No existing dataset found, parsing everything")
+            return Data(parse=True, repo=repo)
+
+        data = Data(repo=repo)
+        if not data.refresh():
+            logger.warning("Dataset has no snapshot, parsing everything")
+            return Data(parse=True, repo=repo)
+        return data
+
+    def refresh(self) -> bool:
+        snapshot = self.__dict__.get("_Data__snapshot")
+        if snapshot is None:
+            return False
+
+        logger.info("Refreshing records updated since {}", snapshot)
+        self.__init_api_store(Data.store(self.__repo), snapshot)
+        return True
+
+    @staticmethod
+    def store(repo: str = DEFAULT_REPO) -> Store:
+        store_path = Data.path(Data.API_STORE, repo)
+        snapshot = Data.path(Data.API_STORE_ARCHIVE, repo)
+        # Restore the store from its snapshot, unless it already got
+        # extracted from or archived to it. Upserts since then are kept.
+        manifest = Data.manifest(repo)
+        if os.path.isfile(snapshot) and not (
+                os.path.isfile(store_path)
+                and manifest.fresh(store_path, [snapshot], content=False)):
+            logger.info("Restoring API store from {}", snapshot)
+            Archive.extract(snapshot, os.path.dirname(store_path))
+            manifest.record(store_path, [snapshot])
+
+        if os.path.isfile(store_path):
+            logger.info("Using API store {}", store_path)
+            return Store(store_path)
+
+        # New shards have no data to start from yet
+        sources = [
+            Data.API_DATA_JSON, Data.API_DATA_ARCHIVE, Data.API_DATA_TARBALL
+        ]
+        if not any(os.path.isfile(Data.path(x, repo)) for x in sources):
+            logger.critical(
+                "No API data found for {}, run a full 'export' of the "
+                "repository first", repo)
+            sys.exit(1)
+
+        # Migrate the API JSON into the store once
+        Data.__extract_api_data(repo)
+        store = Store(store_path)
+        store.import_json(Data.path(Data.API_DATA_JSON, repo))
+        return store
+
+    def __init_api_store(self, store: Store, since: Optional[str] = None):
+        logger.info("Parsing API store content")
+        self.__api_count = store.count(since)
+        latest_update = store.latest_update()
 
         pool_count = os.cpu_count()
         executor = ThreadPoolExecutor(max_workers=pool_count)
@@ -84,7 +228,7 @@ class Data():
 
         futures = []
         logger.info("Adding work items to thread pool")
-        for i, item in enumerate(self.__api_json):
+        for i, item in enumerate(store.records(since)):
             futures.append(executor.submit(self.__parse_api_item, item, i))
 
         logger.info("Waiting for executor for finish")
@@ -94,6 +238,7 @@ class Data():
             except Exception as e:
                 logger.critical("Parsing failed: {}", e)
 
+        self.__snapshot = latest_update
         self.__log_summary()
 
     def __log_summary(self):
@@ -104,17 +249,20 @@ class Data():
     def __parse_api_item(self, item: Dict, i: int):
         if time.process_time() - self.__now > 10:
             logger.info("{}% ({} / {}) [{} PRs / {} issues]",
-                        round(i / len(self.__api_json) * 100, 2), i,
-                        len(self.__api_json), len(self.__pull_requests),
+                        round(i / self.__api_count * 100, 2), i,
+                        self.__api_count, len(self.__pull_requests),
                         len(self.__issues))
             self.__now = time.process_time()
 
+        # Replace possibly existing items on refresh
         if self.__filter != Filter.ISSUES and Data.PR_KEY in item:
             pr = PullRequest(item)
+            self.__issues.pop(pr.id, None)
             self.__pull_requests[pr.id] = pr
 
         elif self.__filter != Filter.PULL_REQUESTS:
             issue = Issue(item)
+            self.__pull_requests.pop(issue.id, None)
             self.__issues[issue.id] = issue
 
     @property
@@ -140,50 +288,73 @@ class Data():
         return os.path.join(Data.DATA_DIR, path)
 
     @staticmethod
-    def api_to_tarball():
+    def api_to_tarball(xz: bool = False, repo: str = DEFAULT_REPO):
         logger.info("Compressing API data")
-        with tarfile.open(Data.API_DATA_TARBALL, "w:xz") as tar:
-            tar.add(Data.API_DATA_JSON, Data.API_JSON)
+        target = Data.API_DATA_TARBALL if xz else Data.API_DATA_ARCHIVE
+        Archive.create(Data.path(Data.API_DATA_JSON, repo),
+                       Data.path(target, repo), xz)
 
     @staticmethod
-    def __extract_api_data():
-        Data.__extract(Data.API_DATA_TARBALL, Data.API_DATA_JSON)
+    def store_to_archive(repo: str = DEFAULT_REPO):
+        store_path = Data.path(Data.API_STORE, repo)
+        snapshot = Data.path(Data.API_STORE_ARCHIVE, repo)
+        Archive.create(store_path, snapshot)
+
+        # The store matches its snapshot, so it needs no extraction
+        Data.manifest(repo).record(store_path, [snapshot])
 
     @staticmethod
-    def __extract_data():
-        Data.__extract(Data.TARBALL, Data.PATH)
+    def manifest(repo: str = DEFAULT_REPO) -> Manifest:
+        return Manifest(Data.path(Manifest.FILE, repo))
 
     @staticmethod
-    def __extract(tarball: str, target_file: str):
-        if os.path.isfile(target_file):
-            logger.info("Using already extracted data from {}", target_file)
-        else:
-            logger.info("Extracting API data")
-            tarfile.open(tarball).extractall(path=Data.DATA_DIR)
+    def __extract_api_data(repo: str):
+        Data.__extract(Data.path(Data.API_DATA_ARCHIVE, repo),
+                       Data.path(Data.API_DATA_TARBALL, repo),
+                       Data.path(Data.API_DATA_JSON, repo), repo)
 
-    def update_api_data(self, json_data: List[Dict]):
-        new_issues = []
+    @staticmethod
+    def __extract_data(repo: str):
+        Data.__extract(Data.path(Data.ARCHIVE, repo),
+                       Data.path(Data.TARBALL, repo),
+                       Data.path(Data.PATH, repo), repo)
 
-        for json_issue in json_data:
-            found = False
+    @staticmethod
+    def __extract(archive: str, tarball: str, target_file: str, repo: str):
+        # Prefer the block archive and fallback to the xz tarball
+        if not os.path.isfile(archive):
+            archive = tarball
+
+        manifest = Data.manifest(repo)
+        if not os.path.isfile(archive) and os.path.isfile(target_file):
+            logger.info("Using data from {} without archive", target_file)
+            return
 
-            for idx, item in enumerate(self.__api_json):
-                if item["id"] == json_issue["id"]:
-                    logger.info("Updating issue {} (updated at {})",
-                                json_issue["number"], json_issue["updated_at"])
-                    self.__api_json[idx] = json_issue
-                    found = True
+        if manifest.fresh(target_file, [archive]):
+            logger.info("Using already extracted data from {}", target_file)
+            return
+
+        logger.info("Extracting data from {}", archive)
+        Archive.extract(archive, os.path.dirname(target_file))
+        manifest.record(target_file, [archive])
 
-            if not found:
-                new_issues.append(json_issue)
+    @staticmethod
+    def archive_path(xz: bool = False, repo: str = DEFAULT_REPO) -> str:
+        return Data.path(Data.TARBALL if xz else Data.ARCHIVE, repo)
 
-        for new_issue in new_issues:
-            logger.info("Adding new issue {}", new_issue["number"])
-            self.__api_json.append(new_issue)
+    @staticmethod
+    def up_to_date(xz: bool = False, repo: str = DEFAULT_REPO) -> bool:
+        return Data.manifest(repo).fresh(Data.archive_path(xz, repo),
+                                         [Data.api_source(repo)])
 
-    def dump_api(self):
-        with open(Data.API_DATA_JSON, "w") as outfile:
-            json.dump(self.__api_json, outfile)
+    @staticmethod
+    def api_source(repo: str = DEFAULT_REPO) -> str:
+        # The committed snapshot, since the store is only restored from it
+        # when being used
+        snapshot = Data.path(Data.API_STORE_ARCHIVE, repo)
+        if os.path.isfile(snapshot):
+            return snapshot
+        return Data.path(Data.API_STORE, repo)
 
     def created_time_series(self) -> Series:
         return self.__time_series(lambda issue: issue.created)
@@ -323,14 +494,28 @@ class Data():
                 res[user] = (item, [item])
         return sorted(res.values(), key=lambda x: len(x[1]))
 
-    def dump(self):
-        logger.info("Saving data to {}", Data.PATH)
-        with open(Data.PATH, "wb") as outfile:
-            pickle.dump(self.__dict__, outfile)
-
-        logger.info("Compressing data to {}", Data.TARBALL)
-        with tarfile.open(Data.TARBALL, "w:xz") as tar:
-            tar.add(Data.PATH, Data.FILE)
+    def dump(self, xz: bool = False):
+        path = Data.path(Data.PATH, self.__repo)
+        logger.info("Saving data to {}", path)
+        # Unchanged data has to result in an identical archive, independent
+        # of the parsing order
+        state = {
+            k: v
+            for k, v in self.__dict__.items()
+            if k not in Data.TRANSIENT_STATE
+        }
+        state["_Data__issues"] = dict(sorted(self.__issues.items()))
+        state["_Data__pull_requests"] = dict(
+            sorted(self.__pull_requests.items()))
+        with open(path, "wb") as outfile:
+            pickle.dump(state, outfile)
+
+        archive = Data.archive_path(xz, self.__repo)
+        Archive.create(path, archive, xz)
+
+        manifest = Data.manifest(self.__repo)
+        manifest.record(archive, [Data.api_source(self.__repo)])
+        manifest.record(path, [archive])
 
     def release_notes_stats(self) -> Series:
         prs = list(
@@ -354,37 +539,232 @@ class Data():
             )
         return series
 
-    def train_release_notes_by_label(self, label: str, tune: bool):
+    def train_release_notes_by_label(self,
+                                     label: str,
+                                     tune: bool,
+                                     jobs: int = 1,
+                                     threads: int = 0,
+                                     budget: Optional[float] = None,
+                                     configs: int = 27):
+        self.train_release_notes_by_labels([label], tune, jobs, threads,
+                                           budget, configs)
+
+    def train_release_notes_by_labels(self,
+                                      labels: List[str],
+                                      tune: bool,
+                                      jobs: int = 1,
+                                      threads: int = 0,
+                                      budget: Optional[float] = None,
+                                      configs: int = 27,
+                                      backends: Optional[List[str]] = None):
         Data.__train(self.__pull_requests.values(), lambda x: x.release_note,
-                     label, tune)
+                     labels, tune, jobs, threads, budget, configs, backends)
 
     @staticmethod
-    def __train(items: List[Any], selector: Callable[[Any], str], label: str,
-                tune: bool):
-        logger.info("Training for label '{}'", label)
+    def __train(items: List[Any], selector: Callable[[Any], str],
+                labels: List[str], tune: bool, jobs: int, threads: int,
+                budget: Optional[float], configs: int,
+                backends: Optional[List[str]]):
+        logger.info("Training for labels {}", labels)
+        items, texts, targets = Data.__texts_and_targets(
+            items, selector, labels)
+
+        # We use 80% for testing and the rest for validation. The split is
+        # stable, which lets later runs reuse the cached featurization.
+        test = [i for i, x in enumerate(items) if Data.is_validation(x.id)]
+        train = sorted(set(range(len(items))) - set(test))
+
+        train_texts = [texts[i] for i in train]
+        train_labels = [targets[i] for i in train]
 
-        # Filter and randomize the items
-        items = list(filter(selector, items))
-        random.shuffle(items)
+        test_texts = [texts[i] for i in test]
+        test_labels = [targets[i] for i in test]
+
+        logger.info("Using {} training and {} testing texts", len(train_texts),
+                    len(test_texts))
+        Data.__save_split(Data.TRAINING_FILE, labels,
+                          [items[i] for i in train])
+        Data.__save_split(Data.VALIDATION_FILE, labels,
+                          [items[i] for i in test])
+
+        # Run the training, TensorFlow is only imported when training
+        # pylint: disable=import-outside-toplevel
+        from .nlp import Nlp
+        Nlp(train_texts, train_labels, test_texts,
+            test_labels).train(tune, jobs, threads, budget, configs,
+                               backends)
+        Engine.save_labels(labels)
+
+    def cross_validate_release_notes(self,
+                                     labels: List[str],
+                                     folds: int,
+                                     jobs: int = 0,
+                                     threads: int = 0,
+                                     backend: str = Engine.MLP):
+        logger.info("Cross validating labels {} on {} folds", labels, folds)
+        _, texts, targets = Data.__texts_and_targets(
+            self.__pull_requests.values(), lambda x: x.release_note, labels)
+
+        # pylint: disable=import-outside-toplevel
+        from .nlp import Nlp
+        Nlp.cross_validate(texts, targets, folds, jobs, threads, backend)
+
+    @staticmethod
+    def __texts_and_targets(
+            items: List[Any], selector: Callable[[Any], str],
+            labels: List[str]) -> Tuple[List[Any], List[str], List[Any]]:
+        # Filter and order the items, the training shuffles them anyway
+        items = sorted(filter(selector, items), key=lambda x: x.id)
         logger.info("{} items selected", len(items))
 
+        # A single label is trained as binary classification, more labels
+        # share one feature matrix and model with an output per label
         texts = []
-        labels = []
+        targets: List[Any] = []
         for item in items:
-            texts.append(selector(item))
-            labels.append(1 if item.labels.contains(label) else 0)
+            texts.append(Preprocessor.text(selector(item)))
+            if len(labels) == 1:
+                targets.append(1 if item.labels.contains(labels[0]) else 0)
+            else:
+                targets.append(
+                    [1 if item.labels.contains(x) else 0 for x in labels])
+        return items, texts, targets
+
+    @staticmethod
+    def is_validation(item_id: int) -> bool:
+        # A stable split, which needs no shuffling of the whole data set
+        return zlib.crc32(str(item_id).encode()) % 5 == 0
 
-        # We use 80% for testing and the rest for validation
-        split_at = int(.8 * len(texts))
+    @staticmethod
+    def stream_release_notes(label: str, stores: List[Store],
+                             validation: bool) -> Iterator[Tuple[str, int]]:
+        for store in stores:
+            for item in store.records():
+                if Data.PR_KEY not in item:
+                    continue
+                pr = PullRequest(item)
+                if pr.release_note and \
+                        Data.is_validation(pr.id) == validation:
+                    text = Preprocessor.text(pr.release_note)
+                    yield text, 1 if pr.labels.contains(label) else 0
 
-        train_texts = texts[:split_at]
-        train_labels = labels[:split_at]
+    @staticmethod
+    def train_release_notes_stream(label: str, repos: List[str]):
+        logger.info("Training for label '{}' on streamed repositories: {}",
+                    label, ", ".join(repos))
+
+        # pylint: disable=import-outside-toplevel
+        from .stream import Stream
+
+        # Every epoch streams the stores again, which are restored only once
+        stores = [Data.store(x) for x in repos]
+        Stream(lambda: Data.stream_release_notes(label, stores, False),
+               lambda: Data.stream_release_notes(label, stores, True)).train()
+        Engine.save_labels([label])
+
+    def train_release_notes_incremental(self,
+                                        label: str,
+                                        replay: float = REPLAY_RATIO):
+        logger.info("Training incrementally for label '{}'", label)
+        trained = Data.__load_split(Data.TRAINING_FILE, label)
+        validation = Data.__load_split(Data.VALIDATION_FILE, label)
+        if trained is None or validation is None:
+            logger.info("No earlier training found, training from scratch")
+            self.train_release_notes_by_label(label, False)
+            return
 
-        test_texts = texts[split_at + 1:]
-        test_labels = labels[split_at + 1:]
+        prs = [x for x in self.__pull_requests.values() if x.release_note]
+        delta = [
+            x for x in prs if x.id not in trained and x.id not in validation
+        ]
+        if not delta:
+            logger.info("No new items since the last training")
+            return
 
-        logger.info("Using {} training and {} testing texts", len(train_texts),
-                    len(test_texts))
+        # Extend the validation split by a stable part of the new items and
+        # mix the rest with a replay sample of earlier training items
+        delta_validation = [x for x in delta if Data.is_validation(x.id)]
+        delta_train = [x for x in delta if not Data.is_validation(x.id)]
+        earlier = [x for x in prs if x.id in trained]
+        train_items = delta_train + random.sample(
+            earlier, min(len(earlier), int(replay * len(delta_train))))
+        random.shuffle(train_items)
+        validation_items = [x for x in prs if x.id in validation]
+        validation_items += delta_validation
+
+        # The model stays the same if all new items are validation items
+        if not delta_train:
+            logger.info("No new training items since the last training")
+            Data.__save_split(Data.VALIDATION_FILE, [label], validation_items)
+            return
+
+        train_texts, train_labels = Data.__release_notes_and_labels(
+            train_items, label)
+        if len(set(train_labels)) < 2:
+            logger.info("New and replayed items contain a single class, "
+                        "training from scratch")
+            self.train_release_notes_by_label(label, False)
+            return
+
+        logger.info(
+            "Fine tuning on {} new and {} replayed items, validating on {}",
+            len(delta_train),
+            len(train_items) - len(delta_train), len(validation_items))
+
+        # pylint: disable=import-outside-toplevel
+        from .nlp import Nlp
+        if not Nlp.fine_tune(
+                train_texts, train_labels,
+                *Data.__release_notes_and_labels(validation_items, label)):
+            logger.info("Fine tuning regressed, training from scratch")
+            self.train_release_notes_by_label(label, False)
+            return
+
+        Data.__save_split(Data.TRAINING_FILE, [label],
+                          [x for x in prs if x.id in trained] + delta_train)
+        Data.__save_split(Data.VALIDATION_FILE, [label], validation_items)
+
+    @staticmethod
+    def __release_notes_and_labels(items: List[Any],
+                                   label: str) -> Tuple[List[str], List[int]]:
+        return ([Preprocessor.text(x.release_note) for x in items],
+                [1 if x.labels.contains(label) else 0 for x in items])
+
+    @staticmethod
+    def __save_split(path: str, labels: List[str], items: List[Any]):
+        # The first label is the one evaluated on the validation split
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "label": labels[0],
+                    "labels": labels,
+                    "ids": [x.id for x in items]
+                }, f)
+        logger.info("Wrote split of {} items to {}", len(items), path)
+
+    @staticmethod
+    def __load_split(path: str, label: str) -> Optional[Set[int]]:
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r") as f:
+            split = json.load(f)
+        if split.get("labels", [split["label"]]) != [label]:
+            return None
+        return set(split["ids"])
+
+    def validation_release_notes(self) -> Tuple[List[str], List[int]]:
+        with open(Data.VALIDATION_FILE, "r") as f:
+            validation = json.load(f)
+
+        texts = []
+        labels = []
+        for item_id in validation["ids"]:
+            pr = self.__pull_requests.get(item_id)
+            if pr is None or not pr.release_note:
+                continue
+            texts.append(Preprocessor.text(pr.release_note))
+            labels.append(1 if pr.labels.contains(validation["label"]) else 0)
 
-        # Run the training
-        Nlp(train_texts, train_labels, test_texts, test_labels).train(tune)
+        logger.info("Loaded {} validation texts for label '{}'", len(texts),
+                    validation["label"])
+        return texts, labels
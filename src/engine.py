@@ -0,0 +1,195 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from scipy.sparse import csr_matrix
+
+
+class Engine():
+    DATA_DIR = "data"
+    MODEL_FILE = os.path.join(DATA_DIR, "model.h5")
+    WEIGHTS_FILE = os.path.join(DATA_DIR, "model.npz")
+    LINEAR_FILE = os.path.join(DATA_DIR, "model-linear.npz")
+
+    # The labels of the model output columns
+    LABELS_FILE = os.path.join(DATA_DIR, "labels.json")
+    DEFAULT_LABELS = ["result"]
+
+    KERAS = "keras"
+    NUMPY = "numpy"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+    DTYPES = [FLOAT16, INT8]
+    LINEAR = "linear"
+    NAMES = [KERAS, NUMPY, NUMPY + "-" + FLOAT16, NUMPY + "-" + INT8, LINEAR]
+
+    # The trainable model backends, the linear one is served by its engine
+    # of the same name
+    MLP = "mlp"
+    BACKENDS = [MLP, LINEAR]
+
+    @staticmethod
+    def weights_file(dtype: str = "float32") -> str:
+        if dtype not in Engine.DTYPES:
+            return Engine.WEIGHTS_FILE
+        return os.path.join(Engine.DATA_DIR, "model-{}.npz".format(dtype))
+
+    @staticmethod
+    def file(name: str) -> str:
+        if name == Engine.LINEAR:
+            return Engine.LINEAR_FILE
+        if name.startswith(Engine.NUMPY):
+            return Engine.weights_file(name[len(Engine.NUMPY) + 1:])
+        return Engine.MODEL_FILE
+
+    @staticmethod
+    def save_labels(labels: List[str]):
+        with open(Engine.LABELS_FILE, "w") as f:
+            json.dump(labels, f)
+        logger.info("Wrote model labels {} to {}", labels, Engine.LABELS_FILE)
+
+    @staticmethod
+    def load_labels() -> List[str]:
+        if not os.path.isfile(Engine.LABELS_FILE):
+            return Engine.DEFAULT_LABELS
+        with open(Engine.LABELS_FILE, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def load(name: str) -> Any:
+        logger.info("Loading {} inference engine", name)
+        if name.startswith(Engine.NUMPY) or name == Engine.LINEAR:
+            return NumpyEngine(Engine.file(name))
+        return KerasEngine(Engine.file(name))
+
+
+class KerasEngine():
+    __model: Any
+    __input: Callable[[csr_matrix], Any]
+
+    def __init__(self, path: str = Engine.MODEL_FILE):
+        # pylint: disable=import-outside-toplevel
+        # TensorFlow is only imported if this engine is actually used
+        import tensorflow as tf
+        from .sparse import Sparse, SparseDropout
+
+        self.__model = tf.keras.models.load_model(
+            path, custom_objects={"SparseDropout": SparseDropout})
+        self.__input = lambda x: Sparse.model_input(self.__model, x)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(x.nbytes for x in self.__model.get_weights())
+
+    def predict(self, x: csr_matrix) -> np.ndarray:
+        return self.__model.predict(self.__input(x))
+
+
+class NumpyEngine():
+    # Quantized kernels are stored as float16 or int8 together with a
+    # float32 scale per output channel
+    __kernels: List[np.ndarray]
+    __scales: List[np.ndarray]
+    __biases: List[np.ndarray]
+    __activations: List[str]
+
+    def __init__(self, path: str = Engine.WEIGHTS_FILE):
+        weights = np.load(path)
+        self.__activations = [str(x) for x in weights["activations"]]
+        layers = range(len(self.__activations))
+        self.__kernels = [weights["kernel_{}".format(i)] for i in layers]
+        self.__biases = [weights["bias_{}".format(i)] for i in layers]
+        self.__scales = [
+            weights["scale_{}".format(i)] if "scale_{}".format(i) in weights
+            else np.ones(self.__kernels[i].shape[1], dtype="float32")
+            for i in layers
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(x.nbytes
+                   for x in self.__kernels + self.__scales + self.__biases)
+
+    @staticmethod
+    def quantize(dtype: str,
+                 source: str = Engine.WEIGHTS_FILE,
+                 target: Optional[str] = None):
+        if target is None:
+            target = Engine.weights_file(dtype)
+
+        weights = dict(np.load(source))
+        for name in [x for x in weights if x.startswith("kernel_")]:
+            kernel = weights[name]
+            scale_name = name.replace("kernel_", "scale_")
+
+            if dtype == Engine.FLOAT16:
+                weights[name] = kernel.astype("float16")
+                weights[scale_name] = np.ones(kernel.shape[1], "float32")
+
+            elif dtype == Engine.INT8:
+                # Symmetric quantization per output channel
+                scale = np.abs(kernel).max(axis=0) / 127
+                scale[scale == 0] = 1
+                weights[name] = np.round(kernel / scale).astype("int8")
+                weights[scale_name] = scale.astype("float32")
+
+            else:
+                raise ValueError("Unsupported dtype: {}".format(dtype))
+
+        np.savez(target, **weights)
+        logger.info("Quantized {} to {} in {}", source, dtype, target)
+
+    @staticmethod
+    def export(model: Any, path: str = Engine.WEIGHTS_FILE):
+        # Dropout is the identity during inference, so only the dense layers
+        # are needed
+        arrays: Dict[str, np.ndarray] = {}
+        activations = []
+        for layer in model.layers:
+            if not layer.get_weights():
+                continue
+            kernel, bias = layer.get_weights()
+            arrays["kernel_{}".format(len(activations))] = kernel
+            arrays["bias_{}".format(len(activations))] = bias
+            activations.append(layer.get_config()["activation"])
+        arrays["activations"] = np.array(activations)
+
+        np.savez(path, **arrays)
+        logger.info("Exported {} dense layers to {}", len(activations), path)
+
+    def predict(self, x: csr_matrix) -> np.ndarray:
+        out: Any = x
+        for kernel, scale, bias, activation in zip(self.__kernels,
+                                                   self.__scales,
+                                                   self.__biases,
+                                                   self.__activations):
+            if isinstance(out, csr_matrix):
+                product = NumpyEngine.__sparse_product(out, kernel)
+            else:
+                product = out @ kernel.astype("float32")
+            out = NumpyEngine.activate(product * scale + bias, activation)
+        return out
+
+    @staticmethod
+    def __sparse_product(x: csr_matrix, kernel: np.ndarray) -> np.ndarray:
+        # Only the kernel rows of the non-zero input columns are read and
+        # converted to float32
+        columns, positions = np.unique(x.indices, return_inverse=True)
+        compact = csr_matrix((x.data, positions, x.indptr),
+                             shape=(x.shape[0], len(columns)))
+        return np.asarray(compact @ kernel[columns].astype("float32"))
+
+    @staticmethod
+    def activate(x: np.ndarray, activation: str) -> np.ndarray:
+        if activation == "relu":
+            return np.maximum(x, 0)
+        if activation == "sigmoid":
+            return 1 / (1 + np.exp(-np.clip(x, -80, 80)))
+        if activation == "softmax":
+            exp = np.exp(x - x.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if activation == "linear":
+            return x
+        raise ValueError("Unsupported activation: {}".format(activation))
@@ -3,6 +3,8 @@ import json
 import os
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from typing import Any, Optional, Tuple
 
 from github import Github, Repository
@@ -10,6 +12,7 @@ from loguru import logger
 
 from .cli import Cli
 from .data import Data
+from .store import Store
 
 
 class Export(Cli):
@@ -33,25 +36,70 @@ class Export(Cli):
                                   action="store_true",
                                   help="Update the data set")
 
+        parser.add_argument(
+            "--incremental",
+            "-i",
+            action="store_true",
+            help="Re-parse only API records changed since the last data set")
+
+        parser.add_argument(
+            "--xz",
+            "-x",
+            action="store_true",
+            help="Compress to xz tarballs instead of block archives")
+
+        parser.add_argument(
+            "--repos",
+            "-r",
+            type=str,
+            nargs="+",
+            metavar="REPO",
+            default=[Data.DEFAULT_REPO],
+            help="The repositories to export (default: {})".format(
+                Data.DEFAULT_REPO))
+
     def run(self):
         if self.args.update_data:
-            logger.info("Updating local data")
-            Data(parse=True).dump()
+            # Every repository is an independent shard
+            with ProcessPoolExecutor() as executor:
+                list(
+                    executor.map(Export.update_data, self.args.repos,
+                                 repeat(self.args.incremental),
+                                 repeat(self.args.xz)))
             return
 
         token = Export.get_github_token()
         github = Github(token)
-        repo = github.get_repo("kubernetes/kubernetes")
+        repos = [github.get_repo(x) for x in self.args.repos]
 
         if self.args.update_api:
             logger.info("Retrieving issues and PRs")
+            (update_file,
+             date) = Export.get_update_file_date(Export.API_UPDATE_FILE)
 
             logger.info("Updating API")
-            Export.update_api(repo)
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(Export.update_api, repos, repeat(date)))
+            Export.write_update_file_date(update_file)
 
         else:
             logger.info("Dumping all issues")
-            Export.dump_api(repo)
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(Export.dump_api, repos,
+                                  repeat(self.args.xz)))
+
+    @staticmethod
+    def update_data(repo: str, incremental: bool, xz: bool):
+        if Data.up_to_date(xz, repo):
+            logger.info("Data set of {} is up to date with the API store",
+                        repo)
+            return
+
+        logger.info("Updating local data of {}", repo)
+        if incremental:
+            Data.incremental(repo).dump(xz)
+        else:
+            Data(parse=True, repo=repo).dump(xz)
 
     @staticmethod
     def get_github_token() -> Optional[str]:
@@ -65,7 +113,7 @@ class Export(Cli):
         return token
 
     @staticmethod
-    def dump_api(repo: Repository):
+    def dump_api(repo: Repository, xz: bool = False):
         result = []
 
         # We use the first (latest) issue as indicator of how many data we have
@@ -84,17 +132,19 @@ class Export(Cli):
                 logger.info("Unable to get data, waiting a minute: {}", err)
                 time.sleep(60)
 
-        with open(Data.API_DATA_JSON, "w") as data_file:
+        with open(Data.path(Data.API_DATA_JSON, repo.full_name),
+                  "w") as data_file:
             json.dump(result, data_file)
 
         logger.info("Done exporting {} items", i)
-        Data.api_to_tarball()
+        Data.api_to_tarball(xz, repo.full_name)
 
-    @staticmethod
-    def update_api(repo: Repository):
-        (update_file,
-         date) = Export.get_update_file_date(Export.API_UPDATE_FILE)
+        logger.info("Populating API store")
+        Store(Data.path(Data.API_STORE, repo.full_name)).upsert(result)
+        Data.store_to_archive(repo.full_name)
 
+    @staticmethod
+    def update_api(repo: Repository, date: datetime.datetime):
         json_list = []
         for issue in repo.get_issues(
                 since=date,
@@ -104,16 +154,9 @@ class Export(Cli):
             logger.info("{}: {}", issue.number, issue.title)
             json_list.append(issue.raw_data)
 
-        data = Data()
-
-        logger.info("Updating data")
-        data.update_api_data(json_list)
-
-        logger.info("Saving data")
-        data.dump_api()
-
-        Data.api_to_tarball()
-        Export.write_update_file_date(update_file)
+        logger.info("Updating data of {}", repo.full_name)
+        Data.store(repo.full_name).upsert(json_list)
+        Data.store_to_archive(repo.full_name)
 
     @staticmethod
     def get_update_file_date(file_name: str) -> Tuple[Any, Any]:
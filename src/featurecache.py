@@ -0,0 +1,104 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+from scipy.sparse import csr_matrix
+
+
+class FeatureCache():
+    __path: str
+
+    DATA_DIR = "data"
+    DIR = os.path.join(DATA_DIR, "cache")
+
+    # Amount of cached featurizations kept on disk
+    MAX_ENTRIES = 4
+
+    MATRICES = ["x_train", "x_val"]
+    ARRAYS = ["data", "indices", "indptr", "shape"]
+    ARTIFACTS_FILE = "artifacts.pickle"
+
+    def __init__(self, path: str = DIR):
+        self.__path = path
+
+    @staticmethod
+    def key(train: List[str], test: List[str], labels: Any,
+            params: List[Any]) -> str:
+        sha = hashlib.sha256()
+        for texts in [train, test]:
+            sha.update(str(len(texts)).encode())
+            for text in texts:
+                sha.update(text.encode("utf-8", "replace"))
+                sha.update(b"\0")
+        labels = np.asarray(labels, dtype="int64")
+        sha.update(repr(labels.shape).encode())
+        sha.update(labels.tobytes())
+        sha.update(repr(params).encode())
+        return sha.hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[Any, ...]]:
+        entry = os.path.join(self.__path, key)
+        if not os.path.isdir(entry):
+            logger.info("Featurization cache miss for {}", key[:16])
+            return None
+
+        matrices = [
+            FeatureCache.__load_matrix(entry, x) for x in FeatureCache.MATRICES
+        ]
+        with open(os.path.join(entry, FeatureCache.ARTIFACTS_FILE),
+                  "rb") as f:
+            artifacts = pickle.load(f)
+
+        # Keep recently used entries from being evicted
+        os.utime(entry)
+        logger.info("Featurization cache hit for {}", key[:16])
+        return tuple(matrices) + tuple(artifacts)
+
+    @staticmethod
+    def __load_matrix(entry: str, name: str) -> csr_matrix:
+        # The arrays are memory mapped, their pages get loaded on access
+        arrays = {
+            x: np.load(os.path.join(entry, "{}.{}.npy".format(name, x)),
+                       mmap_mode="r")
+            for x in FeatureCache.ARRAYS
+        }
+        return csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=tuple(arrays["shape"]),
+            copy=False)
+
+    def save(self, key: str, matrices: List[csr_matrix], artifacts: List[Any]):
+        os.makedirs(self.__path, exist_ok=True)
+
+        # Write into a temporary directory first, which makes concurrent
+        # runs never see incomplete entries
+        temp = tempfile.mkdtemp(dir=self.__path)
+        for name, matrix in zip(FeatureCache.MATRICES, matrices):
+            for array in FeatureCache.ARRAYS:
+                np.save(os.path.join(temp, "{}.{}.npy".format(name, array)),
+                        np.asarray(getattr(matrix, array)))
+        with open(os.path.join(temp, FeatureCache.ARTIFACTS_FILE), "wb") as f:
+            pickle.dump(artifacts, f)
+
+        entry = os.path.join(self.__path, key)
+        try:
+            os.rename(temp, entry)
+        except OSError:
+            shutil.rmtree(temp)
+        logger.info("Saved featurization to cache {}", entry)
+
+        self.__evict()
+
+    def __evict(self):
+        entries = sorted((os.path.join(self.__path, x)
+                          for x in os.listdir(self.__path)),
+                         key=os.path.getmtime,
+                         reverse=True)
+        for entry in entries[FeatureCache.MAX_ENTRIES:]:
+            logger.info("Evicting featurization cache entry {}", entry)
+            shutil.rmtree(entry, ignore_errors=True)
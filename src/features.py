@@ -0,0 +1,50 @@
+import os
+import pickle
+from typing import Any, List, Optional, Tuple
+
+from scipy.sparse import csr_matrix
+from sklearn.feature_selection import SelectKBest
+
+from .vocabulary import Vocabulary
+
+
+class Features():
+    DATA_DIR = "data"
+    VECTORIZER_FILE = os.path.join(DATA_DIR, "vectorizer.pickle")
+    SELECTOR_FILE = os.path.join(DATA_DIR, "selector.pickle")
+    FEATURIZER_FILE = os.path.join(DATA_DIR, "featurizer.pickle")
+    VOCABULARY_FILE = os.path.join(DATA_DIR, "vocabulary.bin")
+    FILES = [VOCABULARY_FILE, FEATURIZER_FILE, VECTORIZER_FILE, SELECTOR_FILE]
+
+    @staticmethod
+    def load() -> Tuple[Any, Optional[SelectKBest]]:
+        if os.path.isfile(Features.VOCABULARY_FILE):
+            # Map the compact vocabulary
+            return Vocabulary(Features.VOCABULARY_FILE), None
+
+        if os.path.isfile(Features.FEATURIZER_FILE):
+            # Load the pruned vectorizer
+            return pickle.load(open(Features.FEATURIZER_FILE, "rb")), None
+
+        # Load the vectorizer
+        vectorizer = pickle.load(open(Features.VECTORIZER_FILE, "rb"))
+
+        # Load the selector
+        selector = pickle.load(open(Features.SELECTOR_FILE, "rb"))
+
+        return vectorizer, selector
+
+    @staticmethod
+    def transform(text: str, vectorizer: Any,
+                  selector: Optional[SelectKBest]) -> csr_matrix:
+        return Features.transform_batch([text], vectorizer, selector)
+
+    @staticmethod
+    def transform_batch(texts: List[str], vectorizer: Any,
+                        selector: Optional[SelectKBest]) -> csr_matrix:
+        vectorized = vectorizer.transform(texts)
+
+        # The pruned featurizer already contains the selection
+        if selector is None:
+            return vectorized.astype("float32")
+        return selector.transform(vectorized).astype("float32")
@@ -1,42 +1,187 @@
-from typing import Dict
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import kfserving
-import tensorflow as tf
 import tornado.web
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.feature_selection import SelectKBest
+from loguru import logger
 
-from .nlp import Nlp
+from .batcher import Batcher, QueueFullError
+from .cache import PredictionCache
+from .engine import Engine
+from .predictor import Predictor
 
 
 class KFServer(kfserving.KFModel):
-    __vectorizer: TfidfVectorizer
-    __selector: SelectKBest
-    __model: tf.keras.models.Sequential
+    __predictor: Predictor
+    __batcher: Batcher
+    __cache: Optional[PredictionCache]
 
-    def __init__(self, name: str):
+    __max_batch_size: int
+    __max_wait: float
+    __engine: str
+    __threads: int
+    __max_queue: int
+    __cache_size: int
+    __cache_ttl: Optional[float]
+    __warmup: List[str]
+
+    # Held while loading, so requests arriving meanwhile do not load again
+    __loading: threading.Lock
+    __created_at: float
+    __first_request: bool
+
+    def __init__(self,
+                 name: str,
+                 max_batch_size: int = 32,
+                 max_wait: float = 0.005,
+                 engine: str = Engine.KERAS,
+                 threads: int = 1,
+                 max_queue: int = 256,
+                 cache_size: int = 10000,
+                 cache_ttl: Optional[float] = None,
+                 warmup: Optional[List[str]] = None):
         super().__init__(name)
         self.name = name
         self.ready = False
+        self.__max_batch_size = max_batch_size
+        self.__max_wait = max_wait
+        self.__engine = engine
+        self.__threads = threads
+        self.__max_queue = max_queue
+        self.__cache_size = cache_size
+        self.__cache_ttl = cache_ttl
+        self.__cache = None
+        self.__warmup = warmup or []
+        self.__loading = threading.Lock()
+        self.__created_at = time.monotonic()
+        self.__first_request = True
+
+    def load_in_background(self):
+        # The server reports the model as not ready until it is loaded and
+        # warmed up
+        threading.Thread(target=self.__load_or_exit, daemon=True).start()
+
+    def __load_or_exit(self):
+        try:
+            self.load()
+        except Exception:  # pylint: disable=broad-except
+            # Exit instead of staying unready forever, so the pod restarts
+            logger.exception("Loading the model failed")
+            os._exit(1)  # pylint: disable=protected-access
 
     def load(self):
-        v, s, m = Nlp.load_from_disk()
+        # The predict handler calls this for unready models, which must not
+        # block the event loop while loading in the background
+        if not self.__loading.acquire(blocking=False):
+            return
+        try:
+            if not self.ready:
+                self.__load()
+        finally:
+            self.__loading.release()
 
-        self.__vectorizer = v
-        self.__selector = s
-        self.__model = m
+    def __load(self):
+        start = time.monotonic()
+        self.__predictor = Predictor.cached(self.__engine)
+        self.__batcher = Batcher(self.__predictor.scores_batch,
+                                 self.__max_batch_size, self.__max_wait,
+                                 ThreadPoolExecutor(self.__threads),
+                                 self.__max_queue)
+        if self.__cache_size > 0:
+            self.__cache = PredictionCache(self.__predictor.version,
+                                           self.__cache_size,
+                                           self.__cache_ttl)
+        loaded = time.monotonic()
+
+        # The first predictions initialize the engine, for example the
+        # TensorFlow graph, so pay for them before accepting requests
+        if self.__warmup:
+            for text in self.__warmup:
+                self.__predictor.scores_batch([text])
+            self.__predictor.scores_batch(self.__warmup)
+        warmed_up = time.monotonic()
 
         self.ready = True
+        logger.info(
+            "Model ready {:.3f}s after start, loading took {:.3f}s, "
+            "warming up with {} texts {:.3f}s", warmed_up - self.__created_at,
+            loaded - start, len(self.__warmup), warmed_up - loaded)
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.__cache.stats if self.__cache is not None else {}
+
+    async def predict(self, request: Dict) -> Dict:
+        if "instances" in request:
+            texts = KFServer.__instances(request["instances"])
+            scores = await self.__predict(texts)
+            return {
+                "predictions": [x[0] for x in scores],
+                "scores": [self.__labeled(x) for x in scores],
+            }
 
-    def predict(self, request: Dict) -> Dict:
         key = "text"
         if key not in request:
             raise tornado.web.HTTPError(
                 status_code=400,
-                reason="no '{}' key in request JSON".format(key))
+                reason="no '{}' or 'instances' key in request JSON".format(
+                    key))
         text = request[key]
 
-        t = Nlp.transform(text, self.__vectorizer, self.__selector)
-        result = self.__model.predict(t)
+        scores = (await self.__predict([text]))[0]
+        return {"result": scores[0], "scores": self.__labeled(scores)}
+
+    def __labeled(self, scores: List[float]) -> Dict[str, float]:
+        return dict(zip(self.__predictor.labels, scores))
+
+    async def __predict(self, texts: List[str]) -> List[List[float]]:
+        if not self.ready:
+            raise tornado.web.HTTPError(status_code=503,
+                                        reason="model is still loading")
+
+        if self.__first_request:
+            self.__first_request = False
+            start = time.monotonic()
+            results = await self.__predict_ready(texts)
+            logger.info("First request took {:.3f}s",
+                        time.monotonic() - start)
+            return results
+        return await self.__predict_ready(texts)
+
+    async def __predict_ready(self, texts: List[str]) -> List[List[float]]:
+        # These would never fit into the queue, so retrying is of no use
+        if len(texts) > self.__max_queue:
+            raise tornado.web.HTTPError(
+                status_code=413,
+                reason="{} texts exceed the queue limit of {}".format(
+                    len(texts), self.__max_queue))
+
+        # Reject requests right away instead of letting them time out
+        try:
+            if self.__cache is None:
+                return await self.__batcher.predict(texts)
+            return await self.__cache.predict(texts, self.__batcher.predict)
+        except QueueFullError as e:
+            raise tornado.web.HTTPError(
+                status_code=503,
+                reason="prediction queue is full: {}".format(e))
+
+    @staticmethod
+    def __instances(instances: Any) -> List[str]:
+        if not isinstance(instances, list):
+            raise tornado.web.HTTPError(status_code=400,
+                                        reason="'instances' is no list")
 
-        return {"result": result[0][0].item()}
+        # Instances are either plain texts or objects with a "text" key
+        texts = []
+        for instance in instances:
+            if isinstance(instance, dict):
+                instance = instance.get("text")
+            if not isinstance(instance, str):
+                raise tornado.web.HTTPError(
+                    status_code=400, reason="instance contains no text")
+            texts.append(instance)
+        return texts
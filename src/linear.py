@@ -0,0 +1,68 @@
+from typing import Any, Dict, List
+
+import numpy as np
+from loguru import logger
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import log_loss
+
+from .engine import Engine, NumpyEngine
+
+
+class Linear():
+    # Inverse regularization strength of the logistic regression
+    C = 10.0
+
+    @staticmethod
+    def fit(x_train: csr_matrix,
+            train_labels: Any,
+            x_val: csr_matrix,
+            test_labels: Any,
+            weights_file: str = Engine.LINEAR_FILE,
+            c: float = C) -> Dict[str, Any]:
+        # Multi-label models get an independent regression per label
+        columns = train_labels.T if train_labels.ndim == 2 else [train_labels]
+        models: List[LogisticRegression] = []
+        for labels in columns:
+            multi_class = len(np.unique(labels)) > 2
+            model = LogisticRegression(
+                C=c, solver="lbfgs" if multi_class else "liblinear")
+            models.append(model.fit(x_train, labels))
+
+        # A logistic regression is a single dense layer, which makes it
+        # servable by the numpy engine
+        if len(models[0].classes_) > 2:
+            kernel = models[0].coef_.T
+            bias = models[0].intercept_
+            activation = "softmax"
+        else:
+            kernel = np.concatenate([x.coef_.T for x in models], axis=1)
+            bias = np.concatenate([x.intercept_ for x in models])
+            activation = "sigmoid"
+
+        np.savez(weights_file,
+                 kernel_0=kernel.astype("float32"),
+                 bias_0=bias.astype("float32"),
+                 activations=np.array([activation]))
+        logger.info("Saved linear model to file {}", weights_file)
+
+        predictions = NumpyEngine(weights_file).predict(x_val)
+        if activation == "softmax":
+            accuracy = np.mean(predictions.argmax(axis=1) == test_labels)
+            loss = log_loss(test_labels,
+                            predictions,
+                            labels=models[0].classes_)
+        else:
+            labels = test_labels.reshape(predictions.shape)
+            accuracy = np.mean((predictions > .5) == labels)
+            loss = np.mean([
+                log_loss(labels[:, i], predictions[:, i], labels=[0, 1])
+                for i in range(labels.shape[1])
+            ])
+        logger.info("Linear model validation accuracy: {}, loss: {}",
+                    accuracy, loss)
+
+        return {
+            "accuracy": float(accuracy),
+            "loss": float(loss),
+        }
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+class Manifest():
+    __path: str
+    __entries: Dict[str, Any]
+
+    DATA_DIR = "data"
+    FILE = os.path.join(DATA_DIR, "manifest.json")
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path: str = FILE):
+        self.__path = path
+        self.__entries = {}
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                self.__entries = json.load(f)
+
+    @staticmethod
+    def hash(path: str) -> Optional[str]:
+        if not os.path.isfile(path):
+            return None
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(Manifest.CHUNK_SIZE), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def __inputs(inputs: List[str],
+                 params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Round trip through JSON to compare equally to the stored entries
+        return json.loads(
+            json.dumps({
+                "files": {x: Manifest.hash(x)
+                          for x in inputs},
+                "params": params or {},
+            }))
+
+    def fresh(self,
+              target: str,
+              inputs: List[str],
+              params: Optional[Dict[str, Any]] = None,
+              content: bool = True) -> bool:
+        entry = self.__entries.get(target)
+        if entry is None:
+            logger.info("No manifest entry for {}", target)
+            return False
+
+        # Targets which get modified in place only depend on their inputs
+        if content and entry["sha256"] != Manifest.hash(target):
+            logger.info("Content of {} changed", target)
+            return False
+
+        if entry["inputs"] != Manifest.__inputs(inputs, params):
+            logger.info("Inputs of {} changed", target)
+            return False
+
+        logger.info("{} is up to date", target)
+        return True
+
+    def record(self,
+               target: str,
+               inputs: List[str],
+               params: Optional[Dict[str, Any]] = None):
+        self.__entries[target] = {
+            "sha256": Manifest.hash(target),
+            "inputs": Manifest.__inputs(inputs, params),
+        }
+
+        with open(self.__path, "w") as f:
+            json.dump(self.__entries, f, indent=2, sort_keys=True)
+        logger.info("Recorded {} in manifest {}", target, self.__path)
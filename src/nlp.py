@@ -1,28 +1,81 @@
+import itertools
 import json
+import multiprocessing
 import os
 import pickle
-from typing import Any, List, Tuple
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
 from loguru import logger
+from scipy.sparse import csr_matrix
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.feature_selection import SelectKBest, f_classif
+from sklearn.metrics import confusion_matrix, multilabel_confusion_matrix
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import normalize
+
+from .engine import Engine, NumpyEngine
+from .featurecache import FeatureCache
+from .features import Features
+from .linear import Linear
+from .sparse import Sparse, SparseDropout
+from .vocabulary import Vocabulary
 
 
 class Nlp():
     DATA_DIR = "data"
-    MODEL_FILE = os.path.join(DATA_DIR, "model.h5")
-    VECTORIZER_FILE = os.path.join(DATA_DIR, "vectorizer.pickle")
-    SELECTOR_FILE = os.path.join(DATA_DIR, "selector.pickle")
+    MODEL_FILE = Engine.MODEL_FILE
+    WEIGHTS_FILE = Engine.WEIGHTS_FILE
+    VECTORIZER_FILE = Features.VECTORIZER_FILE
+    SELECTOR_FILE = Features.SELECTOR_FILE
+    FEATURIZER_FILE = Features.FEATURIZER_FILE
+    VOCABULARY_FILE = Features.VOCABULARY_FILE
+    TUNE_DIR = os.path.join(DATA_DIR, "tune")
+    CV_DIR = os.path.join(DATA_DIR, "cv")
+    INCREMENTAL_MODEL_FILE = os.path.join(DATA_DIR, "model-incremental.h5")
+    INCREMENTAL_WEIGHTS_FILE = os.path.join(DATA_DIR,
+                                            "model-incremental.npz")
     TOP_FEATURES = 50000
 
+    # Amount of validation texts predicted one by one to compare the
+    # latency of the backends
+    LATENCY_TEXTS = 1000
+
+    # Amount of validation rows predicted by both the trained model and its
+    # exported weights to verify the export
+    VERIFY_EXPORT_ROWS = 256
+
+    # The successive halving search space, its minimum amount of epochs per
+    # configuration and the factor of configurations dropped per rung
+    SEARCH_SPACE = {
+        "layers": [1, 2, 3],
+        "units": [8, 16, 32, 64, 128],
+        "learning_rate": [1e-4, 3e-4, 1e-3, 3e-3, 1e-2],
+        "dropout_rate": [0.1, 0.2, 0.3, 0.4, 0.5],
+        "ngram_range": [(1, 1), (1, 2), (1, 3)],
+    }
+    MIN_EPOCHS = 2
+    ETA = 3
+
+    # Maximum epochs and tolerated validation accuracy loss when fine tuning
+    FINE_TUNE_EPOCHS = 20
+    FINE_TUNE_TOLERANCE = 0.01
+
     __train_texts: List[str]
     __train_labels: Any
 
     __test_texts: List[str]
     __test_labels: Any
 
+    # The data sets shared by all tuning or cross validation runs of a
+    # worker process
+    __shared: Tuple[Any, Any, Any]
+
     def __init__(self, train_texts: List[str], train_labels: List[int],
                  test_texts: List[str], test_labels: List[int]):
         self.__train_texts = train_texts
@@ -30,65 +83,289 @@ class Nlp():
         self.__test_texts = test_texts
         self.__test_labels = np.array(test_labels)
 
-    @staticmethod
-    def predict(text: str) -> float:
-        v, s, model = Nlp.load_from_disk()
-        t = Nlp.transform(text, v, s)
-        result = model.predict(t)
-        return result[0][0].item()
+    def train(self,
+              tune: bool = False,
+              jobs: int = 1,
+              threads: int = 0,
+              budget: Optional[float] = None,
+              configs: int = 27,
+              backends: Optional[List[str]] = None):
+        # Tuning searches the hyper parameters of the MLP only
+        if tune and budget is not None:
+            self.__halving(jobs, threads, budget, configs)
+        elif tune:
+            self.__grid(jobs, threads)
+        else:
+            self.__train(backends or [Engine.MLP])
 
-    @staticmethod
-    def transform(text: str, vectorizer: TfidfVectorizer,
-                  selector: SelectKBest) -> np.ndarray:
-        vectorized = vectorizer.transform([text])
-        selected = selector.transform(vectorized).astype("float32")
-        return selected.toarray()
+    def __grid(self, jobs: int, threads: int) -> List[Dict[str, Any]]:
+        num_layers = [1, 2, 3]
+        num_units = [8, 16, 32, 64, 128]
+
+        # Vectorize only once for all parameter combinations
+        self.__verify_labels()
+        vectorized = self.__vectorize_all([(1, 2)])
+
+        with self.__executor(jobs, threads, vectorized) as executor:
+            results = Nlp.__run(executor, [{
+                "name": "model-{}-{}".format(layers, units),
+                "ngram_range": (1, 2),
+                "layers": layers,
+                "units": units,
+            } for layers in num_layers for units in num_units])
+
+        return self.__use_best(results, vectorized)
+
+    def __halving(self, jobs: int, threads: int, budget: float,
+                  configs: int) -> List[Dict[str, Any]]:
+        # Successive halving: train many configurations for a few epochs,
+        # keep the best fraction and continue training those for longer
+        start = time.monotonic()
+        candidates = Nlp.__sample(configs)
+
+        self.__verify_labels()
+        vectorized = self.__vectorize_all(
+            sorted({x["ngram_range"]
+                    for x in candidates}))
+
+        epochs = Nlp.MIN_EPOCHS
+        with self.__executor(jobs, threads, vectorized) as executor:
+            while True:
+                logger.info("Training {} configurations up to epoch {}",
+                            len(candidates), epochs)
+                rung_start = time.monotonic()
+                for candidate in candidates:
+                    candidate["epochs"] = epochs
+                results = Nlp.__run(executor, candidates)
+
+                # Continue only if the next rung likely fits into the budget,
+                # it takes about as long as this one
+                rung_duration = time.monotonic() - rung_start
+                remaining = budget - (time.monotonic() - start)
+                if len(results) == 1 or remaining < rung_duration:
+                    break
+
+                candidates = results[:max(1, len(results) // Nlp.ETA)]
+                epochs *= Nlp.ETA
+
+        logger.info("Search finished after {:.0f}s",
+                    time.monotonic() - start)
+        return self.__use_best(results, vectorized)
 
     @staticmethod
-    def load_from_disk(
-    ) -> Tuple[TfidfVectorizer, SelectKBest, tf.keras.models.Sequential]:
-        # Load the vectorizer
-        vectorizer = pickle.load(open(Nlp.VECTORIZER_FILE, "rb"))
+    def __sample(configs: int) -> List[Dict[str, Any]]:
+        space = list(
+            itertools.product(*[Nlp.SEARCH_SPACE[x]
+                                for x in Nlp.SEARCH_SPACE]))
+        samples = random.sample(space, min(configs, len(space)))
+        return [
+            dict(zip(Nlp.SEARCH_SPACE, sample), name="model-{}".format(i))
+            for i, sample in enumerate(samples)
+        ]
 
-        # Load the selector
-        selector = pickle.load(open(Nlp.SELECTOR_FILE, "rb"))
+    def __vectorize_all(
+            self, ngram_ranges: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Tuple[Any, Any, Any, Any]]:
+        return {
+            x: Nlp.__vectorize(self.__train_texts, self.__test_texts,
+                               self.__train_labels, x, 1, 1.0)
+            for x in ngram_ranges
+        }
 
-        # Load the model
-        model = tf.keras.models.load_model(Nlp.MODEL_FILE)
+    def __executor(
+            self, jobs: int, threads: int,
+            vectorized: Dict[Tuple[int, int], Tuple[Any, Any, Any, Any]]
+    ) -> ProcessPoolExecutor:
+        os.makedirs(Nlp.TUNE_DIR, exist_ok=True)
+        matrices = {x: y[:2] for x, y in vectorized.items()}
+        return Nlp.__pool(jobs, threads,
+                          (matrices, self.__train_labels, self.__test_labels))
 
-        return (vectorizer, selector, model)
+    @staticmethod
+    def __pool(jobs: int, threads: int,
+               shared: Tuple[Any, Any, Any]) -> ProcessPoolExecutor:
+        threads = threads or max(1, (os.cpu_count() or 1) // jobs)
+        logger.info("Running {} processes using {} threads each", jobs,
+                    threads)
+
+        # TensorFlow is not fork safe, so spawn fresh worker processes and
+        # send them the shared data once
+        return ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=Nlp.init_worker,
+            initargs=(shared, threads))
 
-    def train(self, tune: bool = False):
-        if tune:
-            self.__tune()
-        else:
-            self.__train()
+    @staticmethod
+    def __run(executor: ProcessPoolExecutor,
+              configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        futures = [executor.submit(Nlp.tune_worker, x) for x in configs]
+        results = [x.result() for x in futures]
+        results.sort(key=lambda x: x["accuracy"], reverse=True)
+
+        columns = [x for x in Nlp.SEARCH_SPACE if x in results[0]]
+        Nlp.__log_table("Tuning results", columns +
+                        ["trained_epochs", "accuracy", "loss"], results)
+        return results
+
+    def __use_best(
+        self, results: List[Dict[str, Any]],
+        vectorized: Dict[Tuple[int, int], Tuple[Any, Any, Any, Any]]
+    ) -> List[Dict[str, Any]]:
+        best = results[0]
+        logger.info("Using best model {}: {}", best["name"], {
+            x: best[x]
+            for x in Nlp.SEARCH_SPACE if x in best
+        })
+
+        _, x_val, vectorizer, selector = vectorized[best["ngram_range"]]
+        Nlp.__save_features(vectorizer, selector, self.__test_texts, x_val)
+        shutil.copyfile(best["model_file"], Nlp.MODEL_FILE)
+        shutil.copyfile(best["weights_file"], Nlp.WEIGHTS_FILE)
+        return results
 
-    def __tune(self):
-        num_layers = [1, 2, 3]
-        num_units = [8, 16, 32, 64, 128]
+    @staticmethod
+    def init_worker(shared: Tuple[Any, Any, Any], threads: int):
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+        Nlp.__shared = shared
 
-        # Save parameter combination and results
-        params = {
-            "layers": [],
-            "units": [],
-            "accuracy": [],
-        }
+    @staticmethod
+    def tune_worker(params: Dict[str, Any]) -> Dict[str, Any]:
+        matrices, train_labels, test_labels = Nlp.__shared
+        x_train, x_val = matrices[params["ngram_range"]]
+
+        params["model_file"] = os.path.join(Nlp.TUNE_DIR,
+                                            params["name"] + ".h5")
+        params["weights_file"] = os.path.join(Nlp.TUNE_DIR,
+                                              params["name"] + ".npz")
+
+        # Continue training models of earlier rungs
+        params.update(
+            Nlp.fit(x_train,
+                    train_labels,
+                    x_val,
+                    test_labels,
+                    params["model_file"],
+                    params["weights_file"],
+                    learning_rate=params.get("learning_rate", 1e-3),
+                    epochs=params.get("epochs", 1000),
+                    layers=params["layers"],
+                    units=params["units"],
+                    dropout_rate=params.get("dropout_rate", 0.2),
+                    verbose=0,
+                    initial_epoch=params.get("trained_epochs", 0)))
+        logger.info("Accuracy: {}, Model: {}", params["accuracy"],
+                    params["name"])
+        return params
 
-        # Iterate over all parameter combinations
-        for layers in num_layers:
-            for units in num_units:
-                params["layers"].append(layers)
-                params["units"].append(units)
+    @staticmethod
+    def __log_table(title: str, columns: List[str],
+                    results: List[Dict[str, Any]]):
+        def cell(value: Any) -> str:
+            if isinstance(value, float):
+                value = "{:.4g}".format(value)
+            return "{:>14}".format(str(value))
+
+        rows = [" ".join(cell(x[:14]) for x in columns)]
+        for result in results:
+            rows.append(" ".join(cell(result[x]) for x in columns))
+        logger.info("{}:\n{}", title, "\n".join(rows))
 
-                accuracy, _ = self.__train(layers=layers, units=units)
-                logger.info("Accuracy: {}, Layers: {}, Units: {}", accuracy,
-                            layers, units)
-                params["accuracy"].append(accuracy)
+    @staticmethod
+    def cross_validate(texts: List[str],
+                       labels: List[Any],
+                       folds: int,
+                       jobs: int = 0,
+                       threads: int = 0,
+                       backend: str = Engine.MLP) -> List[Dict[str, Any]]:
+        start = time.monotonic()
+        targets = np.array(labels)
+
+        # Multi-label data is stratified by its first label
+        strata = targets[:, 0] if targets.ndim == 2 else targets
+        splits = StratifiedKFold(n_splits=folds, shuffle=True).split(
+            np.zeros(len(targets)), strata)
+
+        os.makedirs(Nlp.CV_DIR, exist_ok=True)
+        jobs = jobs or min(folds, os.cpu_count() or 1)
+        with Nlp.__pool(jobs, threads, (texts, targets, backend)) as executor:
+            futures = [
+                executor.submit(Nlp.cv_worker, i, train, test)
+                for i, (train, test) in enumerate(splits)
+            ]
+            results = [x.result() for x in futures]
+
+        Nlp.__log_table("Cross validation results", [
+            "fold", "train_size", "test_size", "accuracy", "loss",
+            "vectorize_time", "train_time"
+        ], results)
+
+        accuracies = [x["accuracy"] for x in results]
+        logger.info("Accuracy over {} folds: {:.4f} +/- {:.4f}", folds,
+                    np.mean(accuracies), np.std(accuracies))
+
+        # The summed confusion matrices of all folds, one per label for
+        # multi-label data
+        matrix = sum(x["confusion_matrix"] for x in results)
+        for cm in (matrix if targets.ndim == 2 else [matrix]):
+            Nlp.__log_confusion_matrix(cm)
+
+        logger.info("Cross validation finished after {:.0f}s",
+                    time.monotonic() - start)
+        return results
 
-        logger.info("Tuning results: {}", params)
+    @staticmethod
+    def cv_worker(fold: int, train: np.ndarray,
+                  test: np.ndarray) -> Dict[str, Any]:
+        texts, labels, backend = Nlp.__shared
+
+        # Every fold fits its own featurization on its training texts, the
+        # folds are random so caching it is of no use
+        start = time.perf_counter()
+        x_train, x_val, _, _ = Nlp.__vectorize([texts[i] for i in train],
+                                               [texts[i] for i in test],
+                                               labels[train], (1, 2), 1, 1.0,
+                                               False)
+        vectorized = time.perf_counter()
+
+        name = os.path.join(Nlp.CV_DIR, "fold-{}".format(fold))
+        if backend == Engine.LINEAR:
+            result = Linear.fit(x_train, labels[train], x_val, labels[test],
+                                name + ".npz")
+        else:
+            result = Nlp.fit(x_train,
+                             labels[train],
+                             x_val,
+                             labels[test],
+                             name + ".h5",
+                             name + ".npz",
+                             verbose=0)
+        trained = time.perf_counter()
+
+        predictions = NumpyEngine(name + ".npz").predict(x_val)
+        if labels.ndim == 2:
+            cm = multilabel_confusion_matrix(labels[test], predictions > .5)
+        else:
+            predicted = predictions[:, 0] > .5 if predictions.shape[1] == 1 \
+                else predictions.argmax(axis=1)
+            cm = confusion_matrix(labels[test],
+                                  predicted.astype(labels.dtype),
+                                  labels=np.unique(labels))
+
+        result.update({
+            "fold": fold,
+            "train_size": len(train),
+            "test_size": len(test),
+            "vectorize_time": vectorized - start,
+            "train_time": trained - vectorized,
+            "confusion_matrix": cm,
+        })
+        logger.info("Accuracy: {}, Fold: {}", result["accuracy"], fold)
+        return result
 
     def __train(self,
+                backends: List[str],
                 ngram_range: Tuple[int, int] = (1, 2),
                 min_df: int = 1,
                 max_df: float = 1.0,
@@ -97,10 +374,106 @@ class Nlp():
                 batch_size: int = 128,
                 layers: int = 2,
                 units: int = 64,
-                dropout_rate: float = 0.2):
+                dropout_rate: float = 0.2) -> Dict[str, Any]:
+        self.__verify_labels()
+        x_train, x_val, vectorizer, selector = Nlp.__vectorize(
+            self.__train_texts, self.__test_texts, self.__train_labels,
+            ngram_range, min_df, max_df)
+        Nlp.__save_features(vectorizer, selector, self.__test_texts, x_val)
+
+        # All backends are trained on the same features
+        results: Dict[str, Dict[str, Any]] = {}
+        for backend in backends:
+            start = time.perf_counter()
+            if backend == Engine.LINEAR:
+                results[backend] = Linear.fit(x_train, self.__train_labels,
+                                              x_val, self.__test_labels)
+            else:
+                results[backend] = Nlp.fit(x_train, self.__train_labels,
+                                           x_val, self.__test_labels,
+                                           Nlp.MODEL_FILE, Nlp.WEIGHTS_FILE,
+                                           learning_rate, epochs, batch_size,
+                                           layers, units, dropout_rate)
+            results[backend]["train_seconds"] = time.perf_counter() - start
+
+        if len(results) > 1:
+            Nlp.__compare(results, x_val)
+        return results[backends[0]]
+
+    @staticmethod
+    def __compare(results: Dict[str, Dict[str, Any]], x_val: csr_matrix):
+        # Both backends are measured with the numpy engine, which serves
+        # them the same way
+        files = {
+            Engine.MLP: Engine.file(Engine.NUMPY),
+            Engine.LINEAR: Engine.file(Engine.LINEAR),
+        }
+        columns = [
+            "backend", "accuracy", "loss", "train_seconds", "bytes",
+            "latency_ms"
+        ]
+        rows = [" ".join("{:>14}".format(x[:14]) for x in columns)]
+        for backend, result in results.items():
+            engine = NumpyEngine(files[backend])
+            count = min(Nlp.LATENCY_TEXTS, x_val.shape[0])
+            start = time.perf_counter()
+            for i in range(count):
+                engine.predict(x_val[i])
+
+            values = [
+                backend, result["accuracy"], result["loss"],
+                result["train_seconds"],
+                os.path.getsize(files[backend]),
+                1000 * (time.perf_counter() - start) / max(1, count)
+            ]
+            rows.append(" ".join(
+                "{:>14.4g}".format(x) if isinstance(x, float) else
+                "{:>14}".format(str(x)) for x in values))
+        logger.info("Backend comparison:\n{}", "\n".join(rows))
+
+    @staticmethod
+    def fine_tune(train_texts: List[str], train_labels: List[int],
+                  test_texts: List[str], test_labels: List[int]) -> bool:
+        # Keep the fitted features, so the model input stays the same
+        featurizer = pickle.load(open(Nlp.FEATURIZER_FILE, "rb"))
+        x_train = featurizer.transform(train_texts).astype("float32")
+        x_val = featurizer.transform(test_texts).astype("float32")
+
+        model = tf.keras.models.load_model(
+            Nlp.MODEL_FILE, custom_objects={"SparseDropout": SparseDropout})
+        _, baseline = model.evaluate(Sparse.dataset(x_val,
+                                                    np.array(test_labels),
+                                                    128),
+                                     verbose=0)
+        logger.info("Validation accuracy before fine tuning: {}", baseline)
+
+        shutil.copyfile(Nlp.MODEL_FILE, Nlp.INCREMENTAL_MODEL_FILE)
+        result = Nlp.fit(x_train,
+                         np.array(train_labels),
+                         x_val,
+                         np.array(test_labels),
+                         Nlp.INCREMENTAL_MODEL_FILE,
+                         Nlp.INCREMENTAL_WEIGHTS_FILE,
+                         epochs=1 + Nlp.FINE_TUNE_EPOCHS,
+                         initial_epoch=1)
+
+        if result["accuracy"] < baseline - Nlp.FINE_TUNE_TOLERANCE:
+            logger.warning("Validation accuracy regressed from {} to {}",
+                           baseline, result["accuracy"])
+            return False
+
+        os.replace(Nlp.INCREMENTAL_MODEL_FILE, Nlp.MODEL_FILE)
+        os.replace(Nlp.INCREMENTAL_WEIGHTS_FILE, Nlp.WEIGHTS_FILE)
+        logger.info("Using fine tuned model")
+        return True
+
+    def __verify_labels(self):
+        if self.__train_labels.ndim == 2:
+            logger.info("Number of labels: {}", self.__train_labels.shape[1])
+            return
 
         # Verify that test labels are in the same range as training labels
-        num_classes = self.__num_classes()
+        num_classes = Nlp.__num_classes(self.__train_labels)
         logger.info("Number of classes: {}", num_classes)
 
         unexpected_labels = [
@@ -114,24 +487,36 @@ class Nlp():
                 "as training labels.".format(
                     unexpected_labels=unexpected_labels))
 
-        x_train, x_val = Nlp.__vectorize(self.__train_texts, self.__test_texts,
-                                         self.__train_labels, ngram_range,
-                                         min_df, max_df)
-
-        # Create model instance.
-        model = Nlp.__mlp_model(layers, units, dropout_rate, x_train.shape[1:],
-                                num_classes)
-        logger.info("Created model with {} layers and {} units", layers, units)
-
-        # Compile model with learning parameters.
-        if num_classes == 2:
-            loss = "binary_crossentropy"
+    @staticmethod
+    def fit(x_train: csr_matrix,
+            train_labels: Any,
+            x_val: csr_matrix,
+            test_labels: Any,
+            model_file: str,
+            weights_file: str,
+            learning_rate: float = 1e-3,
+            epochs: int = 1000,
+            batch_size: int = 128,
+            layers: int = 2,
+            units: int = 64,
+            dropout_rate: float = 0.2,
+            verbose: int = 2,
+            initial_epoch: int = 0) -> Dict[str, Any]:
+        # Multi-label models predict every label independently
+        multi_label = train_labels.ndim == 2
+        num_classes = train_labels.shape[1] if multi_label \
+            else Nlp.__num_classes(train_labels)
+
+        if initial_epoch > 0:
+            # Continue training with the saved optimizer state
+            logger.info("Continuing training of model {} at epoch {}",
+                        model_file, initial_epoch)
+            model = tf.keras.models.load_model(
+                model_file, custom_objects={"SparseDropout": SparseDropout})
         else:
-            loss = "sparse_categorical_crossentropy"
-
-        logger.info("Compiling model")
-        optimizer = tf.keras.optimizers.Adam(lr=learning_rate)
-        model.compile(optimizer=optimizer, loss=loss, metrics=["acc"])
+            model = Nlp.compiled_model(num_classes, learning_rate, layers,
+                                       units, dropout_rate, x_train.shape[1:],
+                                       multi_label)
 
         # Create callback for early stopping on validation loss. If the loss
         # does not decrease in five consecutive tries, stop training
@@ -139,40 +524,89 @@ class Nlp():
             tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=5)
         ]
 
-        # Train and validate model
+        # Train and validate model on sparse batches
         logger.info("Starting training")
+        train_data = Sparse.dataset(x_train,
+                                    train_labels,
+                                    batch_size,
+                                    shuffle=True)
+        val_data = Sparse.dataset(x_val, test_labels, batch_size)
         x = model.fit(
-            x_train,
-            self.__train_labels,
+            train_data,
             epochs=epochs,
+            initial_epoch=initial_epoch,
             callbacks=callbacks,
-            validation_data=(x_val, self.__test_labels),
-            verbose=2,  # logs once per epoch
-            batch_size=batch_size)
+            validation_data=val_data,
+            verbose=verbose,  # 2 logs once per epoch
+        )
 
         # Print confusion matric
-        predictions = model.predict_classes(x_val)
-        cm = tf.math.confusion_matrix(predictions=predictions,
-                                      labels=self.__test_labels).numpy()
+        if multi_label:
+            matrices = multilabel_confusion_matrix(
+                test_labels,
+                model.predict(val_data) > .5)
+        else:
+            matrices = [
+                tf.math.confusion_matrix(
+                    predictions=model.predict_classes(val_data),
+                    labels=test_labels).numpy()
+            ]
+        for cm in matrices:
+            Nlp.__log_confusion_matrix(cm)
+
+        # Save the model
+        logger.info("Saving model to file {}", model_file)
+        model.save(model_file)
+        NumpyEngine.export(model, weights_file)
+        Nlp.verify_export(model, weights_file, x_val)
+
+        logger.info("Validation accuracy: {}, loss: {}",
+                    x.history["val_acc"][-1], x.history["val_loss"][-1])
+
+        return {
+            "accuracy": x.history["val_acc"][-1],
+            "loss": x.history["val_loss"][-1],
+            "trained_epochs": initial_epoch + len(x.history["val_loss"]),
+        }
+
+    @staticmethod
+    def __log_confusion_matrix(cm: np.ndarray):
         logger.info("Confusion matrix:\n{}", cm)
 
         cm_norm = np.around(cm.astype("float") / cm.sum(axis=1)[:, np.newaxis],
                             decimals=3)
         logger.info("Confusion matrix normalized:\n{}", cm_norm)
 
-        # Save the model
-        logger.info("Saving model to file {}", Nlp.MODEL_FILE)
-        model.save(Nlp.MODEL_FILE)
+    @staticmethod
+    def compiled_model(
+            num_classes: int,
+            learning_rate: float,
+            layers: int,
+            units: int,
+            dropout_rate: float,
+            input_shape: Tuple,
+            multi_label: bool = False) -> tf.keras.models.Sequential:
+        # Create model instance.
+        model = Nlp.__mlp_model(layers, units, dropout_rate, input_shape,
+                                num_classes, multi_label)
+        logger.info("Created model with {} layers and {} units", layers, units)
 
-        logger.info("Validation accuracy: {}, loss: {}",
-                    x.history["val_acc"][-1], x.history["val_loss"][-1])
+        # Compile model with learning parameters.
+        if num_classes == 2 or multi_label:
+            loss = "binary_crossentropy"
+        else:
+            loss = "sparse_categorical_crossentropy"
 
-        return x.history["val_acc"][-1], x.history["val_loss"][-1]
+        logger.info("Compiling model")
+        optimizer = tf.keras.optimizers.Adam(lr=learning_rate)
+        model.compile(optimizer=optimizer, loss=loss, metrics=["acc"])
+        return model
 
-    def __num_classes(self) -> int:
-        num_classes = max(self.__train_labels) + 1
+    @staticmethod
+    def __num_classes(train_labels: Any) -> int:
+        num_classes = max(train_labels) + 1
         missing_classes = [
-            i for i in range(num_classes) if i not in self.__train_labels
+            i for i in range(num_classes) if i not in train_labels
         ]
 
         if len(missing_classes) > 0:
@@ -197,68 +631,158 @@ class Nlp():
         ngram_range: Tuple[int, int],
         min_df: int,
         max_df: float,
-    ) -> Tuple[Any, Any]:
-        vectorizer = TfidfVectorizer(
-            analyzer="word",
-            decode_error="replace",
-            ngram_range=ngram_range,
-            min_df=min_df,
-            max_df=max_df,
-            strip_accents="unicode",
-        )
+        cached: bool = True,
+    ) -> Tuple[Any, Any, TfidfVectorizer, SelectKBest]:
+        # Reuse the featurization of earlier runs on the same data
+        cache = FeatureCache()
+        key = FeatureCache.key(
+            train, test, labels,
+            [ngram_range, min_df, max_df, Nlp.TOP_FEATURES])
+        if cached:
+            result = cache.load(key)
+            if result is not None:
+                return result
+
+        # Normalize after the feature selection, which allows folding the
+        # selection into a pruned vectorizer
+        vectorizer = Nlp.__vectorizer(ngram_range, min_df, max_df, None)
 
         # Learn vocabulary from training texts and vectorize training texts
         x_train = vectorizer.fit_transform(train)
-
-        logger.info("Vocabulary len: {}", len(vectorizer.get_feature_names()))
-        with open(os.path.join(Nlp.DATA_DIR, "features.json"), "w") as f:
-            json.dump(vectorizer.get_feature_names(), f)
-            logger.info("Wrote features to file {}", f.name)
+        logger.info("Vocabulary len: {}", len(vectorizer.vocabulary_))
 
         # Vectorize validation texts
         x_val = vectorizer.transform(test)
 
-        # Save the vectorizer
-        pickle.dump(vectorizer, open(Nlp.VECTORIZER_FILE, "wb"))
-
         # Select top "k" of the vectorized features
-        selector = SelectKBest(f_classif,
+        score_func = f_classif
+        if np.ndim(labels) == 2:
+            score_func = Nlp.multi_label_f_classif
+        selector = SelectKBest(score_func,
                                k=min(Nlp.TOP_FEATURES, x_train.shape[1]))
         selector.fit(x_train, labels)
 
-        x_train = selector.transform(x_train).astype("float32")
-        x_val = selector.transform(x_val).astype("float32")
+        x_train = normalize(selector.transform(x_train)).astype("float32")
+        x_val = normalize(selector.transform(x_val)).astype("float32")
 
-        # Save the selector
-        pickle.dump(selector, open(Nlp.SELECTOR_FILE, "wb"))
+        if cached:
+            cache.save(key, [x_train, x_val], [vectorizer, selector])
+        return x_train, x_val, vectorizer, selector
 
-        return x_train.toarray(), x_val.toarray()
+    @staticmethod
+    def __save_features(vectorizer: TfidfVectorizer, selector: SelectKBest,
+                        test: List[str], x_val: csr_matrix):
+        with open(os.path.join(Nlp.DATA_DIR, "features.json"), "w") as f:
+            json.dump(vectorizer.get_feature_names(), f)
+            logger.info("Wrote features to file {}", f.name)
+
+        # Save the pruned vectorizer
+        featurizer = Nlp.prune(vectorizer, selector)
+        Nlp.verify_featurizer(featurizer, test, x_val)
+        pickle.dump(featurizer, open(Nlp.FEATURIZER_FILE, "wb"))
+        logger.info("Saved pruned vectorizer to {}", Nlp.FEATURIZER_FILE)
+
+        # Save the memory mappable vocabulary
+        Vocabulary.write(featurizer, Nlp.VOCABULARY_FILE)
+        Nlp.verify_featurizer(Vocabulary(Nlp.VOCABULARY_FILE), test, x_val)
+
+    @staticmethod
+    def __vectorizer(ngram_range: Tuple[int, int], min_df: int, max_df: float,
+                     norm: Optional[str]) -> TfidfVectorizer:
+        return TfidfVectorizer(
+            analyzer="word",
+            decode_error="replace",
+            ngram_range=ngram_range,
+            min_df=min_df,
+            max_df=max_df,
+            norm=norm,
+            strip_accents="unicode",
+        )
+
+    @staticmethod
+    def prune(vectorizer: TfidfVectorizer,
+              selector: SelectKBest) -> TfidfVectorizer:
+        # Keep only the selected terms in their selected column order
+        support = selector.get_support(indices=True)
+        terms = np.array(vectorizer.get_feature_names())[support]
+
+        pruned = Nlp.__vectorizer(vectorizer.ngram_range, vectorizer.min_df,
+                                  vectorizer.max_df, "l2")
+        pruned.vocabulary = {term: i for i, term in enumerate(terms)}
+        pruned.idf_ = vectorizer.idf_[support]
+
+        logger.info("Pruned vocabulary from {} to {} terms",
+                    len(vectorizer.vocabulary_), len(pruned.vocabulary_))
+        return pruned
+
+    @staticmethod
+    def verify_featurizer(featurizer: Any, texts: List[str],
+                          expected: csr_matrix):
+        if not texts:
+            return
+
+        actual = featurizer.transform(texts).astype("float32")
+        diff = abs(actual - expected).max()
+        if diff > 1e-6:
+            raise ValueError(
+                "Pruned vectorizer differs from the trained features "
+                "by {}".format(diff))
+        logger.info("Pruned vectorizer matches trained features")
+
+    @staticmethod
+    def verify_export(model: tf.keras.models.Sequential, weights_file: str,
+                      x: csr_matrix):
+        # The served numpy engine has to predict like the trained model
+        x = x[:Nlp.VERIFY_EXPORT_ROWS]
+        if x.shape[0] == 0:
+            return
+
+        expected = model.predict(Sparse.model_input(model, x))
+        actual = NumpyEngine(weights_file).predict(x)
+        diff = abs(actual - expected).max()
+        if diff > 1e-5:
+            raise ValueError(
+                "Exported weights {} differ from the trained model "
+                "by {}".format(weights_file, diff))
+        logger.info("Exported weights match the trained model")
+
+    @staticmethod
+    def multi_label_f_classif(x: csr_matrix, labels: Any) -> Tuple[Any, Any]:
+        # Features score by their best ANOVA F-value over all labels
+        scores, p_values = zip(*(f_classif(x, labels[:, i])
+                                 for i in range(labels.shape[1])))
+        return np.nanmax(scores, axis=0), np.nanmin(p_values, axis=0)
 
     @staticmethod
     def __mlp_model(layers: int, units: int, dropout_rate: float,
-                    input_shape: Tuple,
-                    num_classes: int) -> tf.keras.models.Sequential:
+                    input_shape: Tuple, num_classes: int,
+                    multi_label: bool) -> tf.keras.models.Sequential:
 
-        units, activation = Nlp.__get_last_layer_units_and_activation(
-            num_classes)
+        output_units, activation = Nlp.__get_last_layer_units_and_activation(
+            num_classes, multi_label)
 
+        # The sparse input is fed directly into the first dense layer
         model = tf.keras.models.Sequential()
-        model.add(
-            tf.keras.layers.Dropout(rate=dropout_rate,
-                                    input_shape=input_shape))
+        model.add(tf.keras.layers.InputLayer(input_shape=input_shape,
+                                             sparse=True))
+        model.add(SparseDropout(rate=dropout_rate))
 
         for _ in range(layers - 1):
             model.add(tf.keras.layers.Dense(units=units, activation="relu"))
             model.add(tf.keras.layers.Dropout(rate=dropout_rate))
 
-        model.add(tf.keras.layers.Dense(units=units, activation=activation))
+        model.add(
+            tf.keras.layers.Dense(units=output_units, activation=activation))
 
         return model
 
     @staticmethod
     def __get_last_layer_units_and_activation(
-            num_classes: int) -> Tuple[int, str]:
-        if num_classes == 2:
+            num_classes: int, multi_label: bool) -> Tuple[int, str]:
+        if multi_label:
+            activation = "sigmoid"
+            units = num_classes
+        elif num_classes == 2:
             activation = "sigmoid"
             units = 1
         else:
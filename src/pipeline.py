@@ -9,8 +9,11 @@ from loguru import logger
 
 from .cli import Cli
 from .data import Data
+from .engine import Engine
 from .export import Export
-from .nlp import Nlp
+from .featurecache import FeatureCache
+from .features import Features
+from .manifest import Manifest
 
 
 class Pipeline(Cli):
@@ -24,6 +27,10 @@ class Pipeline(Cli):
     GITHUB_TOKEN_MOUNT_PATH = "/secrets/github"
     QUAY_SECRET_MOUNT_PATH = "/secrets/quay"
 
+    # The featurization cache outlives single runs on a persistent volume
+    CACHE_CLAIM = "feature-cache"
+    CACHE_MOUNT_PATH = "/cache"
+
     @staticmethod
     def add_parser(command: str, subparsers: Any):
         subparsers.add_parser(command, help="build the Kubeflow pipeline")
@@ -66,7 +73,7 @@ class Pipeline(Cli):
             """.format(path=Pipeline.GITHUB_TOKEN_MOUNT_PATH)),
             inputs=[repo],
             outputs={
-                "api": Data.API_DATA_TARBALL,
+                "api": Data.API_STORE_ARCHIVE,
                 "update-file": Export.API_UPDATE_FILE,
             })
         api = update_api_outputs["api"]
@@ -76,14 +83,16 @@ class Pipeline(Cli):
         # Udpate the training data from the API
         update_data, update_data_outputs = Pipeline.container(
             "update-data",
-            "./main export --update-data",
+            "./main export --update-data --incremental",
             inputs=[repo, api],
             outputs={
-                "data": Data.TARBALL,
+                "data": Data.ARCHIVE,
+                "manifest": Manifest.FILE,
             },
         )
         update_data.after(update_api)
         data = update_data_outputs["data"]
+        data_manifest = update_data_outputs["manifest"]
 
         # Udpate the analysis assets
         update_assets, update_assets_outputs = Pipeline.container(
@@ -97,25 +106,45 @@ class Pipeline(Cli):
         # Train the model
         train, train_outputs = Pipeline.container(
             "train",
-            "./main train",
-            inputs=[repo, data],
+            dedent("""
+                ln -s {} {}
+                ./main train
+            """.format(Pipeline.CACHE_MOUNT_PATH, FeatureCache.DIR)),
+            inputs=[repo, data, data_manifest],
             outputs={
-                "vectorizer": Nlp.VECTORIZER_FILE,
-                "selector": Nlp.SELECTOR_FILE,
-                "model": Nlp.MODEL_FILE,
+                "featurizer": Features.FEATURIZER_FILE,
+                "vocabulary": Features.VOCABULARY_FILE,
+                "model": Engine.MODEL_FILE,
+                "weights": Engine.WEIGHTS_FILE,
+                "labels": Engine.LABELS_FILE,
+                "manifest": Manifest.FILE,
             },
         )
         train.container.set_gpu_limit("2")
+        claim = k8s.V1PersistentVolumeClaimVolumeSource(
+            claim_name=Pipeline.CACHE_CLAIM)
+        train.add_volume(
+            k8s.V1Volume(name=Pipeline.CACHE_CLAIM,
+                         persistent_volume_claim=claim))
+        train.container.add_volume_mount(
+            k8s.V1VolumeMount(name=Pipeline.CACHE_CLAIM,
+                              mount_path=Pipeline.CACHE_MOUNT_PATH))
         train.after(update_data)
-        vectorizer = train_outputs["vectorizer"]
-        selector = train_outputs["selector"]
+        featurizer = train_outputs["featurizer"]
+        vocabulary = train_outputs["vocabulary"]
         model = train_outputs["model"]
+        weights = train_outputs["weights"]
+        labels = train_outputs["labels"]
+        manifest = train_outputs["manifest"]
 
         # Predict and test the model
         predict, _ = Pipeline.container(
             "predict",
-            "./main predict --test",
-            inputs=[repo, vectorizer, selector, model],
+            dedent("""
+                ./main predict --test
+                ./main predict --test --engine {}
+            """.format(Engine.NUMPY)),
+            inputs=[repo, featurizer, vocabulary, model, weights, labels],
         )
         predict.after(train)
 
@@ -139,7 +168,7 @@ class Pipeline(Cli):
                        commit=commit,
                        secret=Pipeline.QUAY_SECRET_MOUNT_PATH,
                        pr=pr)),
-            inputs=[repo, vectorizer, selector, model],
+            inputs=[repo, featurizer, vocabulary, model, weights, labels],
         )
         for ctr in ["main", "wait"]:
             build_image.add_pod_annotation(
@@ -160,8 +189,8 @@ class Pipeline(Cli):
               fi
             """.format(pr)),
             inputs=[
-                repo, api, update_file, data, assets, vectorizer, selector,
-                model
+                repo, api, update_file, data, assets, featurizer, vocabulary,
+                model, weights, labels, manifest
             ],
         )
         commit_changes.after(build_image)
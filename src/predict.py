@@ -1,10 +1,14 @@
+import json
 import sys
-from typing import Any
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
 
 from loguru import logger
 
 from .cli import Cli
-from .nlp import Nlp
+from .engine import Engine
+from .predictor import Predictor
 
 
 class Predict(Cli):
@@ -50,13 +54,47 @@ class Predict(Cli):
             type=float,
             help="The threshold for returning a positive exit code")
 
-        parser.add_argument("--test",
-                            "-t",
-                            action="store_true",
-                            help="Run two simple test cases")
+        parser.add_argument(
+            "--test",
+            "-t",
+            action="store_true",
+            help="Run two simple test cases and check the latency of huge "
+            "texts")
+
+        parser.add_argument(
+            "--max-latency",
+            "-l",
+            type=float,
+            default=1000,
+            metavar="MS",
+            help="The maximum latency of a huge text when testing "
+            "(default: 1000)")
+
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=str,
+            metavar="FILE",
+            help="Predict NDJSON texts from FILE ('-' for stdin) to stdout")
+
+        parser.add_argument("--batch-size",
+                            "-s",
+                            type=int,
+                            default=256,
+                            help="The amount of texts predicted at once")
+
+        parser.add_argument("--engine",
+                            "-e",
+                            choices=Engine.NAMES,
+                            default=Engine.KERAS,
+                            help="The inference engine (default: {})".format(
+                                Engine.KERAS))
 
     def run(self):
-        if self.args.test:
+        if self.args.batch:
+            self.predict_batch(self.args.batch)
+
+        elif self.args.test:
             logger.info("Testing positive text:\n{}",
                         Predict.POSITIVE_TEST_TEXT)
             self.predict_and_evaluate(Predict.POSITIVE_TEST_TEXT)
@@ -66,11 +104,13 @@ class Predict(Cli):
             self.predict_and_evaluate(Predict.NEGATIVE_TEST_TEXT,
                                       expected_positive=False)
 
+            self.test_latency()
+
         else:
             self.predict_and_evaluate(self.args.text)
 
     def predict_and_evaluate(self, text: str, expected_positive: bool = True):
-        result = Nlp.predict(text)
+        result = Predictor.cached(self.args.engine).predict(text)
         logger.info("Got prediction result: {}", result)
 
         if expected_positive and result < self.args.threshold:
@@ -80,3 +120,70 @@ class Predict(Cli):
 
         logger.info("Matched expected {} prediction result",
                     "positive" if expected_positive else "negative")
+
+    def test_latency(self):
+        # The first prediction initializes the engine
+        predictor = Predictor.cached(self.args.engine)
+        predictor.predict(Predict.POSITIVE_TEST_TEXT)
+
+        for name, text in Predict.huge_texts():
+            start = time.perf_counter()
+            predictor.predict(text)
+            duration = 1000 * (time.perf_counter() - start)
+            logger.info("Predicted {} of {} characters in {:.1f}ms", name,
+                        len(text), duration)
+
+            if duration > self.args.max_latency:
+                logger.error("Latency is higher than selected maximum {}ms",
+                             self.args.max_latency)
+                sys.exit(1)
+
+        logger.info("Matched expected latency for huge texts")
+
+    @staticmethod
+    def huge_texts() -> List[Tuple[str, str]]:
+        # Pasted logs and other worst cases of about 8MB each
+        size = 8 * 1024 * 1024
+        log_line = "I0102 15:04:05.000000    1234 kubelet.go:1234] " \
+            "SyncLoop (PLEG): event for pod\n"
+        return [
+            ("log lines", log_line * (size // len(log_line))),
+            ("unclosed code fence", "```\n" + "panic: " * (size // 7)),
+            ("code fences", "```a```" * (size // 7)),
+            ("single token", "a" * size),
+            ("words", "fix " * (size // 4)),
+            ("accented words", "àéîõü " * (size // 6)),
+            ("lines", "\n" * size),
+        ]
+
+    def predict_batch(self, file_name: str):
+        in_file = sys.stdin if file_name == "-" else open(file_name, "r")
+
+        count = 0
+        with in_file:
+            items = Predict.__read_ndjson(in_file)
+            while True:
+                batch = list(islice(items, self.args.batch_size))
+                if not batch:
+                    break
+
+                results = Predictor.cached(self.args.engine).predict_batch(
+                    [x["text"] for x in batch])
+                for item, result in zip(batch, results):
+                    item["result"] = result
+                    sys.stdout.write(json.dumps(item) + "\n")
+                count += len(batch)
+
+        logger.info("Predicted {} texts", count)
+
+    @staticmethod
+    def __read_ndjson(in_file: Any) -> Iterator[Dict[str, Any]]:
+        # Every line is either a JSON object with a "text" key or a string
+        for line in in_file:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                item = {"text": item}
+            yield item
@@ -0,0 +1,65 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from loguru import logger
+from sklearn.feature_selection import SelectKBest
+
+from .engine import Engine
+from .features import Features
+from .manifest import Manifest
+from .preprocessor import Preprocessor
+
+
+class Predictor():
+    __vectorizer: Any
+    __selector: Optional[SelectKBest]
+    __engine: Any
+    __version: str
+    __labels: List[str]
+
+    def __init__(self, engine: str = Engine.KERAS):
+        logger.info("Loading predictor from disk")
+        self.__vectorizer, self.__selector = Features.load()
+        self.__engine = Engine.load(engine)
+        self.__labels = Engine.load_labels()
+        self.__version = Predictor.__hash_files(
+            [Engine.file(engine), Engine.LABELS_FILE] + Features.FILES)
+        logger.info("Loaded model version {}", self.__version)
+
+    @property
+    def version(self) -> str:
+        return self.__version
+
+    @property
+    def labels(self) -> List[str]:
+        return self.__labels
+
+    @staticmethod
+    def __hash_files(paths: List[str]) -> str:
+        sha = hashlib.sha256()
+        for path in paths:
+            sha.update(str(Manifest.hash(path)).encode())
+        return sha.hexdigest()[:16]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def cached(engine: str = Engine.KERAS) -> "Predictor":
+        return Predictor(engine)
+
+    def predict(self, text: str) -> float:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        return [x[0] for x in self.scores_batch(texts)]
+
+    def scores_batch(self, texts: List[str]) -> List[List[float]]:
+        # The scores of all labels from one forward pass per text
+        if not texts:
+            return []
+
+        # Preprocess like the training texts
+        t = Features.transform_batch([Preprocessor.text(x) for x in texts],
+                                     self.__vectorizer, self.__selector)
+        result = self.__engine.predict(t)
+        return [x.tolist() for x in result]
@@ -0,0 +1,37 @@
+import re
+from itertools import islice
+
+
+class Preprocessor():
+    # Bounds of the raw input size and of the tokens kept after stripping,
+    # which bound the cost of vectorizing arbitrarily large texts
+    MAX_BYTES = 262144
+    MAX_TOKENS = 1000
+
+    # Fenced code blocks, an unclosed fence reaches until the end
+    CODE_FENCE = re.compile(r"```.*?(?:```|\Z)", re.DOTALL)
+
+    # Log lines with a timestamp or klog header, goroutine headers and Go
+    # stack frames
+    LOG_LINE = re.compile(r"\s*(?:\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}"
+                          r"|[IWEF]\d{4} \d{2}:\d{2}:\d{2}"
+                          r"|goroutine \d+ \["
+                          r"|\S+\.go:\d+)")
+
+    TOKEN = re.compile(r"\S+")
+
+    @staticmethod
+    def text(text: str) -> str:
+        # A character is at least one byte, so slicing the characters first
+        # avoids encoding huge texts
+        text = text[:Preprocessor.MAX_BYTES].encode(
+            "utf-8")[:Preprocessor.MAX_BYTES].decode("utf-8", "ignore")
+
+        text = Preprocessor.CODE_FENCE.sub("\n", text)
+        text = "\n".join(x for x in text.splitlines()
+                         if not Preprocessor.LOG_LINE.match(x))
+
+        # The vectorizer splits tokens on whitespace anyway
+        tokens = islice(Preprocessor.TOKEN.finditer(text),
+                        Preprocessor.MAX_TOKENS)
+        return " ".join(x.group() for x in tokens)
@@ -0,0 +1,94 @@
+import time
+from typing import Any, List
+
+import numpy as np
+from loguru import logger
+
+from .cli import Cli
+from .data import Data
+from .engine import Engine, NumpyEngine
+from .features import Features
+
+
+class Quantize(Cli):
+    @staticmethod
+    def add_parser(command: str, subparsers: Any):
+        parser = subparsers.add_parser(
+            command, help="quantize the trained model weights")
+
+        parser.add_argument("--dtype",
+                            "-d",
+                            choices=Engine.DTYPES,
+                            default=Engine.INT8,
+                            help="The weight type (default: {})".format(
+                                Engine.INT8))
+
+        parser.add_argument(
+            "--evaluate",
+            "-e",
+            action="store_true",
+            help="Compare the quantized against the float32 model on the "
+            "validation split")
+
+        parser.add_argument("--baseline",
+                            "-b",
+                            choices=[Engine.KERAS, Engine.NUMPY],
+                            default=Engine.KERAS,
+                            help="The float32 engine to compare against "
+                            "(default: {})".format(Engine.KERAS))
+
+        parser.add_argument("--batch-size",
+                            "-s",
+                            type=int,
+                            default=256,
+                            help="The amount of texts predicted at once")
+
+    def run(self):
+        NumpyEngine.quantize(self.args.dtype)
+        if self.args.evaluate:
+            self.evaluate()
+
+    def evaluate(self):
+        texts, labels = Data().validation_release_notes()
+        vectorizer, selector = Features.load()
+        x = Features.transform_batch(texts, vectorizer, selector)
+
+        baseline = self.__evaluate(self.args.baseline, x, labels)
+        quantized = self.__evaluate(
+            "{}-{}".format(Engine.NUMPY, self.args.dtype), x, labels)
+
+        logger.info("Accuracy delta: {:+.4f}",
+                    quantized["accuracy"] - baseline["accuracy"])
+        logger.info("Max prediction delta: {:.6f}",
+                    np.abs(quantized["results"] - baseline["results"]).max())
+        logger.info("Weights shrunk by factor {:.2f}",
+                    baseline["bytes"] / quantized["bytes"])
+
+    def __evaluate(self, name: str, x: Any, labels: List[int]) -> Any:
+        engine = Engine.load(name)
+
+        start = time.perf_counter()
+        batches = [
+            engine.predict(x[i:i + self.args.batch_size])
+            for i in range(0, x.shape[0], self.args.batch_size)
+        ]
+        batch_duration = time.perf_counter() - start
+        results = np.concatenate(batches)[:, 0]
+
+        start = time.perf_counter()
+        for i in range(x.shape[0]):
+            engine.predict(x[i])
+        single_duration = time.perf_counter() - start
+
+        accuracy = np.mean((results > .5) == np.array(labels, dtype=bool))
+        logger.info(
+            "{}: accuracy {:.4f}, {:.3f}ms per text, "
+            "{:.3f}ms per batch of {}, {} weight bytes", name, accuracy,
+            1000 * single_duration / x.shape[0],
+            1000 * batch_duration / len(batches), self.args.batch_size,
+            engine.nbytes)
+        return {
+            "accuracy": accuracy,
+            "results": results,
+            "bytes": engine.nbytes,
+        }
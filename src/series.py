@@ -1,4 +1,5 @@
-from typing import Any, List
+import heapq
+from typing import Any, Dict, List
 
 import numpy as np
 
@@ -43,3 +44,34 @@ class Series():
 
     def __next__(self):
         return next(self.__ys)
+
+    def deltas(self) -> List[List]:
+        res = []
+        last = 0
+        for x, y in zip(self.__xs, self.__ys):
+            res.append([x, y - last])
+            last = y
+        return res
+
+    @staticmethod
+    def merge_cumulative(series: List["Series"]) -> "Series":
+        # Merge the sorted events of every series and accumulate them again
+        res = Series()
+        count = 0
+        for x, delta in heapq.merge(*[s.deltas() for s in series],
+                                    key=lambda event: event[0]):
+            count += delta
+            res.add(x, count)
+        return res
+
+    @staticmethod
+    def merge_counts(series: List["Series"]) -> "Series":
+        counts: Dict[Any, Any] = {}
+        for item in series:
+            for x, y in item.zip():
+                counts[x] = counts.get(x, 0) + y
+
+        res = Series()
+        for x, y in sorted(counts.items(), key=lambda count: count[1]):
+            res.add(x, y)
+        return res
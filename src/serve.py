@@ -1,9 +1,15 @@
+import gc
+import os
+import sys
 from typing import Any
 
-import kfserving
+from loguru import logger
 
 from .cli import Cli
+from .engine import Engine
 from .kfserver import KFServer
+from .predict import Predict
+from .server import Server
 
 
 class Serve(Cli):
@@ -11,10 +17,108 @@ class Serve(Cli):
 
     @staticmethod
     def add_parser(command: str, subparsers: Any):
-        subparsers.add_parser(command, help="serve the machine learning model")
+        parser = subparsers.add_parser(command,
+                                       help="serve the machine learning model")
 
-    @staticmethod
-    def run():
-        model = KFServer(Serve.SERVICE_NAME)
-        model.load()
-        kfserving.KFServer(workers=1).start([model])
+        parser.add_argument(
+            "--max-batch-size",
+            "-b",
+            type=int,
+            default=32,
+            help="The maximum amount of texts predicted at once (default: 32)")
+
+        parser.add_argument(
+            "--max-wait",
+            "-w",
+            type=float,
+            default=5,
+            metavar="MS",
+            help="Milliseconds to wait for requests joining a batch "
+            "(default: 5)")
+
+        parser.add_argument("--engine",
+                            "-e",
+                            choices=Engine.NAMES,
+                            default=Engine.KERAS,
+                            help="The inference engine (default: {})".format(
+                                Engine.KERAS))
+
+        parser.add_argument(
+            "--workers",
+            "-n",
+            type=int,
+            default=1,
+            help="The amount of server processes, 0 for one per CPU core "
+            "(default: 1)")
+
+        parser.add_argument(
+            "--threads",
+            "-t",
+            type=int,
+            default=1,
+            help="The amount of prediction threads per worker (default: 1)")
+
+        parser.add_argument(
+            "--max-queue",
+            "-q",
+            type=int,
+            default=256,
+            help="The maximum amount of queued texts per worker before "
+            "responding with HTTP 503 (default: 256)")
+
+        parser.add_argument(
+            "--cache-size",
+            "-c",
+            type=int,
+            default=10000,
+            help="The amount of cached prediction results per worker, 0 to "
+            "disable the cache (default: 10000)")
+
+        parser.add_argument(
+            "--cache-ttl",
+            "-l",
+            type=float,
+            metavar="SECONDS",
+            help="The lifetime of cached prediction results (default: "
+            "unlimited)")
+
+        parser.add_argument(
+            "--warmup",
+            "-u",
+            type=str,
+            nargs="*",
+            metavar="TEXT",
+            default=[Predict.POSITIVE_TEST_TEXT, Predict.NEGATIVE_TEST_TEXT],
+            help="The texts predicted before the model reports ready, none "
+            "to disable (default: the predict test texts)")
+
+    def run(self):
+        workers = self.args.workers or os.cpu_count() or 1
+        if workers > 1 and self.args.engine == Engine.KERAS:
+            logger.error("The {} engine is not fork safe, use one of: {}",
+                         Engine.KERAS,
+                         ", ".join(x for x in Engine.NAMES
+                                   if x != Engine.KERAS))
+            sys.exit(1)
+
+        # With several workers, the model gets loaded before the server forks
+        # them, which then share the model pages copy-on-write
+        model = KFServer(Serve.SERVICE_NAME, self.args.max_batch_size,
+                         self.args.max_wait / 1000, self.args.engine,
+                         self.args.threads, self.args.max_queue,
+                         self.args.cache_size, self.args.cache_ttl,
+                         self.args.warmup)
+        if workers > 1:
+            model.load()
+
+            # Keep the garbage collector from touching the objects of the
+            # parent, which would copy their pages into every worker
+            if hasattr(gc, "freeze"):
+                gc.collect()
+                gc.freeze()
+        else:
+            # Listen right away and report ready after loading
+            model.load_in_background()
+
+        logger.info("Starting {} server worker(s)", workers)
+        Server(workers=workers).start([model])
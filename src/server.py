@@ -0,0 +1,33 @@
+import json
+from typing import Any
+
+import kfserving
+import tornado.web
+
+
+class Server(kfserving.KFServer):
+    def create_application(self) -> tornado.web.Application:
+        application = super().create_application()
+        application.wildcard_router.add_rules([
+            (r"/v1/models/([a-zA-Z0-9_-]+):cache", CacheHandler,
+             dict(models=self.registered_models)),
+        ])
+        return application
+
+
+class CacheHandler(tornado.web.RequestHandler):
+    # pylint: disable=abstract-method
+    models: Any
+
+    def initialize(self, models: Any):
+        # pylint: disable=attribute-defined-outside-init
+        self.models = models
+
+    def get(self, name: str):
+        model = self.models.get_model(name)
+        if model is None:
+            raise tornado.web.HTTPError(
+                status_code=404,
+                reason="model {} does not exist".format(name))
+
+        self.write(json.dumps(model.cache_stats))
@@ -0,0 +1,62 @@
+from typing import Any, Dict
+
+import numpy as np
+import tensorflow as tf
+from scipy.sparse import csr_matrix
+
+
+class Sparse():
+    @staticmethod
+    def to_tensor(matrix: csr_matrix) -> tf.SparseTensor:
+        coo = matrix.tocoo()
+        indices = np.column_stack((coo.row, coo.col)).astype("int64")
+        return tf.sparse.reorder(
+            tf.SparseTensor(indices, coo.data.astype("float32"), coo.shape))
+
+    @staticmethod
+    def dataset(matrix: csr_matrix,
+                labels: Any,
+                batch_size: int,
+                shuffle: bool = False) -> tf.data.Dataset:
+        # Batches stay sparse, so memory scales with the non-zero entries
+        dataset = tf.data.Dataset.from_tensor_slices(
+            (Sparse.to_tensor(matrix), labels))
+        if shuffle:
+            dataset = dataset.shuffle(matrix.shape[0],
+                                      reshuffle_each_iteration=True)
+        return dataset.batch(batch_size)
+
+    @staticmethod
+    def is_sparse_model(model: tf.keras.models.Sequential) -> bool:
+        return isinstance(model.layers[0], SparseDropout)
+
+    @staticmethod
+    def model_input(model: tf.keras.models.Sequential,
+                    matrix: csr_matrix) -> Any:
+        # Models trained before sparse support expect dense input
+        if Sparse.is_sparse_model(model):
+            return Sparse.to_tensor(matrix)
+        return matrix.toarray()
+
+
+class SparseDropout(tf.keras.layers.Layer):
+    __rate: float
+
+    def __init__(self, rate: float, **kwargs):
+        super().__init__(**kwargs)
+        self.__rate = rate
+
+    def call(self, inputs: tf.SparseTensor, training: Any = None) -> Any:
+        if not training or self.__rate == 0:
+            return inputs
+
+        # Drop the stored values only, the zeros stay implicit
+        keep = tf.random.uniform(tf.shape(inputs.values)) >= self.__rate
+        kept = tf.sparse.retain(inputs, keep)
+        return tf.SparseTensor(kept.indices, kept.values / (1 - self.__rate),
+                               kept.dense_shape)
+
+    def get_config(self) -> Dict[str, Any]:
+        config = super().get_config()
+        config["rate"] = self.__rate
+        return config
@@ -0,0 +1,95 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+
+class Store():
+    __path: str
+
+    # Amount of rows fetched from the database cursor at once
+    FETCH_SIZE = 1000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY,
+            number INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS records_updated_at
+            ON records (updated_at);
+    """
+
+    def __init__(self, path: str):
+        self.__path = path
+        with self.__connect() as conn:
+            conn.executescript(Store.SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @contextmanager
+    def __connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.__path)
+        try:
+            # The connection acts as transaction: commit on success and
+            # rollback on any error
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def upsert(self, items: List[Dict]) -> int:
+        rows = [(item["id"], item["number"], item["updated_at"],
+                 json.dumps(item)) for item in items]
+
+        with self.__connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO records (id, number, updated_at, data)
+                VALUES (?, ?, ?, ?)
+                """, rows)
+
+        logger.info("Upserted {} records into {}", len(rows), self.__path)
+        return len(rows)
+
+    def records(self, since: Optional[str] = None) -> Iterator[Dict]:
+        query = "SELECT data FROM records"
+        params: List[Any] = []
+        if since is not None:
+            query += " WHERE updated_at >= ?"
+            params.append(since)
+        query += " ORDER BY updated_at"
+
+        with self.__connect() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(Store.FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield json.loads(row[0])
+
+    def count(self, since: Optional[str] = None) -> int:
+        query = "SELECT COUNT(*) FROM records"
+        params: List[Any] = []
+        if since is not None:
+            query += " WHERE updated_at >= ?"
+            params.append(since)
+
+        with self.__connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def latest_update(self) -> Optional[str]:
+        with self.__connect() as conn:
+            return conn.execute(
+                "SELECT MAX(updated_at) FROM records").fetchone()[0]
+
+    def import_json(self, path: str):
+        logger.info("Importing API JSON {} into {}", path, self.__path)
+        with open(path, "r") as json_file:
+            self.upsert(json.load(json_file))
@@ -0,0 +1,130 @@
+import os
+import pickle
+import random
+from itertools import islice
+from typing import Any, Callable, Iterator, List, Tuple
+
+import numpy as np
+from loguru import logger
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from .engine import Engine, NumpyEngine
+from .features import Features
+from .nlp import Nlp
+from .sparse import Sparse
+
+# Yields the (text, label) pairs of the data set once per call
+Source = Callable[[], Iterator[Tuple[str, int]]]
+
+
+class Stream():
+    __train: Source
+    __validation: Source
+    __vectorizer: HashingVectorizer
+
+    # The amount of hashed feature columns and of texts held in memory and
+    # shuffled at once
+    FEATURES = 2**18
+    CHUNK_SIZE = 10000
+
+    def __init__(self, train: Source, validation: Source):
+        self.__train = train
+        self.__validation = validation
+        self.__vectorizer = Stream.vectorizer()
+
+    @staticmethod
+    def vectorizer() -> HashingVectorizer:
+        # Stateless, so there is no vocabulary to fit and keep in memory
+        return HashingVectorizer(
+            analyzer="word",
+            decode_error="replace",
+            ngram_range=(1, 2),
+            strip_accents="unicode",
+            n_features=Stream.FEATURES,
+            alternate_sign=False,
+            norm="l2",
+            dtype=np.float32,
+        )
+
+    def __batches(self, source: Source, batch_size: int,
+                  shuffle: bool) -> Iterator[Tuple[csr_matrix, np.ndarray]]:
+        items = source()
+        while True:
+            chunk = list(islice(items, Stream.CHUNK_SIZE))
+            if not chunk:
+                break
+            if shuffle:
+                random.shuffle(chunk)
+
+            x = self.__vectorizer.transform([text for text, _ in chunk])
+            y = np.array([label for _, label in chunk])
+            for i in range(0, len(chunk), batch_size):
+                yield x[i:i + batch_size], y[i:i + batch_size]
+
+    def train(self,
+              learning_rate: float = 1e-3,
+              epochs: int = 1000,
+              batch_size: int = 128,
+              layers: int = 2,
+              units: int = 64,
+              dropout_rate: float = 0.2,
+              patience: int = 5):
+        model = Nlp.compiled_model(2, learning_rate, layers, units,
+                                   dropout_rate, (Stream.FEATURES, ))
+
+        # Stop if the validation loss does not decrease in five consecutive
+        # epochs and keep the best weights
+        best_loss = float("inf")
+        best_weights = model.get_weights()
+        waiting = 0
+        for epoch in range(epochs):
+            count = 0
+            for x, y in self.__batches(self.__train, batch_size, True):
+                model.train_on_batch(Sparse.to_tensor(x), y)
+                count += len(y)
+
+            loss, accuracy = self.__evaluate(model, batch_size)
+            logger.info(
+                "Epoch {}: trained on {} texts, validation accuracy: {}, "
+                "loss: {}", epoch + 1, count, accuracy, loss)
+
+            if loss < best_loss:
+                best_loss = loss
+                best_weights = model.get_weights()
+                waiting = 0
+            else:
+                waiting += 1
+                if waiting >= patience:
+                    break
+
+        model.set_weights(best_weights)
+        Stream.__save(model, self.__vectorizer)
+
+    def __evaluate(self, model: Any, batch_size: int) -> Tuple[float, float]:
+        # Weighted by batch size, since the last batch may be smaller
+        results: List[np.ndarray] = []
+        sizes: List[int] = []
+        for x, y in self.__batches(self.__validation, batch_size, False):
+            results.append(
+                np.array(model.test_on_batch(Sparse.to_tensor(x), y)))
+            sizes.append(len(y))
+
+        loss, accuracy = np.average(results, axis=0, weights=sizes)
+        return float(loss), float(accuracy)
+
+    @staticmethod
+    def __save(model: Any, vectorizer: HashingVectorizer):
+        logger.info("Saving model to file {}", Engine.MODEL_FILE)
+        model.save(Engine.MODEL_FILE)
+        NumpyEngine.export(model, Engine.WEIGHTS_FILE)
+
+        pickle.dump(vectorizer, open(Features.FEATURIZER_FILE, "wb"))
+        logger.info("Saved hashing vectorizer to {}",
+                    Features.FEATURIZER_FILE)
+
+        # A vocabulary of an earlier training does not match the model
+        if os.path.isfile(Features.VOCABULARY_FILE):
+            logger.info("Removing outdated vocabulary {}",
+                        Features.VOCABULARY_FILE)
+            os.remove(Features.VOCABULARY_FILE)
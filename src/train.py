@@ -1,10 +1,28 @@
+import sys
 from typing import Any
 
+from loguru import logger
+
 from .cli import Cli
 from .data import Data
+from .engine import Engine
+from .features import Features
+from .manifest import Manifest
 
 
 class Train(Cli):
+    OUTPUTS = [
+        Features.FEATURIZER_FILE,
+        Features.VOCABULARY_FILE,
+        Engine.LABELS_FILE,
+    ]
+
+    # The model files written by every backend
+    BACKEND_OUTPUTS = {
+        Engine.MLP: [Engine.MODEL_FILE, Engine.WEIGHTS_FILE],
+        Engine.LINEAR: [Engine.LINEAR_FILE],
+    }
+
     @staticmethod
     def add_parser(command: str, subparsers: Any):
         parser = subparsers.add_parser(command,
@@ -18,6 +36,155 @@ class Train(Cli):
                             type=str,
                             default="kind/bug",
                             help="The label to classify (default: 'kind/bug')")
+        parser.add_argument(
+            "--labels",
+            "-L",
+            type=str,
+            nargs="+",
+            metavar="LABEL",
+            help="Train a single multi-label model for all given labels "
+            "instead of --label")
+        parser.add_argument(
+            "--backend",
+            "-m",
+            choices=Engine.BACKENDS,
+            default=Engine.MLP,
+            help="The model to train, the linear model is served by the "
+            "'{}' engine (default: {})".format(Engine.LINEAR, Engine.MLP))
+        parser.add_argument(
+            "--compare",
+            "-C",
+            action="store_true",
+            help="Train all backends on the same features and report their "
+            "accuracy, training time, size and latency")
+        parser.add_argument("--force",
+                            "-f",
+                            action="store_true",
+                            help="Train even if the model is up to date")
+        parser.add_argument(
+            "--jobs",
+            "-j",
+            type=int,
+            help="The amount of parallel tuning or cross validation "
+            "processes (default: 1 for tuning, one per fold up to the CPU "
+            "count for cross validation)")
+        parser.add_argument(
+            "--threads",
+            "-r",
+            type=int,
+            default=0,
+            help="The amount of threads per tuning or cross validation "
+            "process, 0 to share the CPU cores equally (default: 0)")
+        parser.add_argument(
+            "--cv",
+            "-k",
+            type=int,
+            metavar="K",
+            help="Only evaluate by stratified K-fold cross validation "
+            "without writing a model")
+        parser.add_argument(
+            "--budget",
+            "-b",
+            type=float,
+            metavar="SECONDS",
+            help="Tune by successive halving within the time budget instead "
+            "of the full layer/unit grid")
+        parser.add_argument(
+            "--configs",
+            "-c",
+            type=int,
+            default=27,
+            help="The amount of sampled configurations for successive "
+            "halving (default: 27)")
+        parser.add_argument(
+            "--stream",
+            "-s",
+            action="store_true",
+            help="Train out of core on hashed features streamed from the "
+            "API stores")
+        parser.add_argument(
+            "--repos",
+            "-g",
+            type=str,
+            nargs="+",
+            metavar="REPO",
+            default=[Data.DEFAULT_REPO],
+            help="The repositories to stream (default: {})".format(
+                Data.DEFAULT_REPO))
+        parser.add_argument(
+            "--incremental",
+            "-i",
+            action="store_true",
+            help="Fine tune the current model on the items added since the "
+            "last training")
+        parser.add_argument(
+            "--replay",
+            "-p",
+            type=float,
+            default=Data.REPLAY_RATIO,
+            help="Earlier training items replayed per new item when training "
+            "incrementally (default: {})".format(Data.REPLAY_RATIO))
 
     def run(self):
-        Data().train_release_notes_by_label(self.args.label, self.args.tune)
+        if self.args.labels and (self.args.stream or self.args.incremental):
+            logger.error("Multiple labels are not supported when streaming or "
+                         "training incrementally")
+            sys.exit(1)
+
+        if self.args.cv is not None:
+            if self.args.cv < 2 or self.args.tune or self.args.stream or \
+                    self.args.incremental or self.args.compare:
+                logger.error("Cross validation needs at least 2 folds and "
+                             "does not support tuning, streaming, "
+                             "incremental training or comparing")
+                sys.exit(1)
+            Data().cross_validate_release_notes(
+                self.args.labels or [self.args.label], self.args.cv,
+                self.args.jobs or 0, self.args.threads, self.args.backend)
+            return
+
+        backends = Engine.BACKENDS if self.args.compare \
+            else [self.args.backend]
+        if backends != [Engine.MLP] and (self.args.tune or self.args.stream
+                                         or self.args.incremental):
+            logger.error("Tuning, streaming and incremental training only "
+                         "support the {} backend", Engine.MLP)
+            sys.exit(1)
+
+        outputs = Train.OUTPUTS + [
+            x for backend in backends for x in Train.BACKEND_OUTPUTS[backend]
+        ]
+        inputs = [Data.ARCHIVE]
+        params = {
+            "label": self.args.label,
+            "labels": self.args.labels,
+            "backends": backends,
+            "incremental": self.args.incremental,
+            "tune": self.args.tune,
+            "budget": self.args.budget,
+            "configs": self.args.configs,
+        }
+        if self.args.stream:
+            inputs = [Data.api_source(x) for x in self.args.repos]
+            params = {"label": self.args.label, "stream": True}
+
+        manifest = Manifest()
+        if not self.args.force and all(
+                manifest.fresh(x, inputs, params) for x in outputs):
+            logger.info("Model is up to date with the data set")
+            return
+
+        if self.args.stream:
+            Data.train_release_notes_stream(self.args.label, self.args.repos)
+        elif self.args.incremental:
+            Data().train_release_notes_incremental(self.args.label,
+                                                   self.args.replay)
+        else:
+            Data().train_release_notes_by_labels(
+                self.args.labels or [self.args.label], self.args.tune,
+                self.args.jobs or 1, self.args.threads, self.args.budget,
+                self.args.configs, backends)
+
+        manifest = Manifest()
+        for output in outputs:
+            manifest.record(output, inputs, params)
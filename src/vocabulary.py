@@ -0,0 +1,167 @@
+import json
+import struct
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from loguru import logger
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class Vocabulary():
+    # Sorted fixed width terms, their feature columns and the idf weights per
+    # column. All arrays are memory mapped read only from a single file,
+    # which allows sharing them between processes
+    __terms: np.ndarray
+    __columns: np.ndarray
+    __idf: np.ndarray
+
+    __analyzer: Callable[[str], List[str]]
+    __norm: str
+
+    # File layout: <magic> <header length: uint64> <JSON header> <arrays>
+    MAGIC = b"KAVOCv01"
+    HEADER = struct.Struct("<8sQ")
+    ALIGNMENT = 64
+
+    PARAMS = [
+        "analyzer",
+        "decode_error",
+        "lowercase",
+        "ngram_range",
+        "norm",
+        "strip_accents",
+        "token_pattern",
+    ]
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, length = Vocabulary.HEADER.unpack(
+                f.read(Vocabulary.HEADER.size))
+            if magic != Vocabulary.MAGIC:
+                raise ValueError("{} is no vocabulary file".format(path))
+            header = json.loads(f.read(length))
+
+        arrays = {
+            name: np.memmap(path,
+                            mode="r",
+                            dtype=np.dtype(x["dtype"]),
+                            offset=x["offset"],
+                            shape=tuple(x["shape"]))
+            for name, x in header["arrays"].items()
+        }
+        self.__terms = arrays["terms"]
+        self.__columns = arrays["columns"]
+        self.__idf = arrays["idf"]
+
+        params = header["params"]
+        params["ngram_range"] = tuple(params["ngram_range"])
+        self.__norm = params["norm"]
+        self.__analyzer = TfidfVectorizer(**params).build_analyzer()
+
+        logger.info("Mapped vocabulary of {} terms from {}", len(self),
+                    path)
+
+    def __len__(self) -> int:
+        return len(self.__terms)
+
+    @staticmethod
+    def write(vectorizer: TfidfVectorizer, path: str):
+        if vectorizer.sublinear_tf or not vectorizer.use_idf:
+            raise ValueError("Only plain TF-IDF vectorizers are supported")
+
+        items = sorted(
+            (term.encode("utf-8"), column)
+            for term, column in vectorizer.vocabulary_.items())
+        arrays = {
+            "terms": np.array([term for term, _ in items]),
+            "columns": np.array([column for _, column in items],
+                                dtype="int32"),
+            "idf": np.asarray(vectorizer.idf_, dtype="float32"),
+        }
+
+        params: Dict[str, Any] = vectorizer.get_params()
+        header: Dict[str, Any] = {
+            "params": {x: params[x]
+                       for x in Vocabulary.PARAMS},
+            "arrays": {},
+        }
+
+        # The offsets depend on the header length, so reserve enough space
+        # for the header before aligning the arrays behind it
+        offset = Vocabulary.HEADER.size + 4096
+        for name, array in arrays.items():
+            offset = Vocabulary.__align(offset)
+            header["arrays"][name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset += array.nbytes
+
+        encoded = json.dumps(header).encode()
+        if Vocabulary.HEADER.size + len(encoded) > 4096:
+            raise ValueError("Vocabulary header too large")
+
+        with open(path, "wb") as f:
+            f.write(Vocabulary.HEADER.pack(Vocabulary.MAGIC, len(encoded)))
+            f.write(encoded)
+            for name, array in arrays.items():
+                f.seek(header["arrays"][name]["offset"])
+                f.write(array.tobytes())
+
+        logger.info("Wrote vocabulary of {} terms to {}", len(items), path)
+
+    @staticmethod
+    def __align(offset: int) -> int:
+        return -(-offset // Vocabulary.ALIGNMENT) * Vocabulary.ALIGNMENT
+
+    def transform(self, texts: List[str]) -> csr_matrix:
+        data: List[np.ndarray] = []
+        indices: List[np.ndarray] = []
+        indptr = [0]
+
+        for text in texts:
+            columns, values = self.__transform(text)
+            data.append(values)
+            indices.append(columns)
+            indptr.append(indptr[-1] + len(columns))
+
+        return csr_matrix(
+            (np.concatenate(data) if data else np.array([], "float32"),
+             np.concatenate(indices) if indices else np.array([], "int32"),
+             np.array(indptr)),
+            shape=(len(texts), len(self.__idf)),
+            dtype="float32")
+
+    def __transform(self, text: str) -> Any:
+        counts = Counter(self.__analyzer(text))
+
+        # Terms longer than the table width can not be part of it
+        width = self.__terms.dtype.itemsize
+        terms = [x for x in counts if len(x.encode("utf-8")) <= width]
+        empty = np.array([], "int32"), np.array([], "float32")
+        if not terms:
+            return empty
+
+        query = np.array([x.encode("utf-8") for x in terms],
+                         dtype=self.__terms.dtype)
+        positions = np.searchsorted(self.__terms, query)
+        positions[positions == len(self.__terms)] = 0
+        found = self.__terms[positions] == query
+        if not found.any():
+            return empty
+
+        term_counts = np.array([counts[x] for x in terms],
+                               dtype="float32")[found]
+        columns = np.asarray(self.__columns[positions[found]])
+        values = term_counts * self.__idf[columns]
+
+        if self.__norm == "l2":
+            values /= np.sqrt(np.sum(values**2))
+        elif self.__norm == "l1":
+            values /= np.sum(np.abs(values))
+
+        order = np.argsort(columns)
+        return columns[order], values[order].astype("float32")